@@ -9,6 +9,7 @@ from dataclasses import dataclass
 import json
 
 # Third-party imports
+import httpx
 from dotenv import load_dotenv
 from pydantic_ai import Agent, RunContext
 from pydantic_ai.models.openai import OpenAIModel
@@ -28,13 +29,26 @@ load_dotenv()
 GROQ_API_KEY = os.environ.get("GROQ_API_KEY")
 GROQ_BASE = "https://api.groq.com/openai/v1"
 
+# One pooled async HTTP client shared by every agent, so LLM calls reuse
+# keep-alive connections to Groq instead of paying a TLS handshake each time
+llm_http_client = httpx.AsyncClient(
+    timeout=httpx.Timeout(timeout=120, connect=5),
+    limits=httpx.Limits(max_connections=20, max_keepalive_connections=10, keepalive_expiry=60),
+)
+
 # Use Groq model. pydantic_ai's OpenAIModel can point at Groq's OpenAI-compatible endpoint.
 active_model = OpenAIModel(
     model_name="openai/gpt-oss-20b",
     base_url=GROQ_BASE,
-    api_key=GROQ_API_KEY or ""
+    api_key=GROQ_API_KEY or "",
+    http_client=llm_http_client
 )
 
+
+async def close_llm_http_client() -> None:
+    """Close the shared LLM HTTP client. Call once on application shutdown."""
+    await llm_http_client.aclose()
+
 @dataclass
 class VehicleContext:
     """Context passed to agents"""
@@ -58,11 +58,11 @@ async def send_buffer_to_llm(buffer: deque, second_index: int, data_manager: Opt
     try:
         # Import agents here to avoid circular imports
         from agents_final import diagnostic_agent, VehicleContext
-        from utils import VehicleDataManager
+        from utils import get_data_manager
         
-        # Use default data manager if not provided
+        # Use the shared data manager if not provided
         if data_manager is None:
-            data_manager = VehicleDataManager(db_path="dataset/newData.json")
+            data_manager = get_data_manager("dataset/newData.json")
         
         # Create context for agent
         context = VehicleContext(
@@ -164,8 +164,8 @@ def load_and_process_all_packets(file_path: str = "dataset/newData.json", enable
         
         # Initialize data manager for agent context
         try:
-            from utils import VehicleDataManager
-            data_manager = VehicleDataManager(db_path=file_path)
+            from utils import get_data_manager
+            data_manager = get_data_manager(file_path)
         except Exception as e:
             print(f"[FETCH] Could not initialize data manager: {e}")
             data_manager = None
@@ -176,23 +176,24 @@ def load_and_process_all_packets(file_path: str = "dataset/newData.json", enable
         anomaly_buffer = deque(maxlen=BUFFER_SIZE_SECONDS)
         
         for idx, packet in enumerate(packets):
-            normalized = normalize_packet(packet)
+            # packets is this call's own json.load result (never Decimal), so the
+            # rule fields below are set on it in place without a normalization copy
             
             # Apply predefined rules
             try:
-                rule_ok = ruleGate(normalized, MD)
+                rule_ok = ruleGate(packet, MD)
             except Exception as e:
                 print(f"[FETCH] RuleGate error at packet {idx}: {e}")
                 rule_ok = True  # Default to healthy on error
             
             # Add rule result to packet
-            normalized["_rule_result"] = rule_ok
-            normalized["_packet_index"] = idx
+            packet["_rule_result"] = rule_ok
+            packet["_packet_index"] = idx
             
-            processed_packets.append(normalized)
+            processed_packets.append(packet)
             
             # Maintain rolling buffer
-            anomaly_buffer.append(normalized)
+            anomaly_buffer.append(packet)
             
             # Track anomalies and call LLM analysis
             if not rule_ok:
@@ -215,7 +216,7 @@ def load_and_process_all_packets(file_path: str = "dataset/newData.json", enable
                         analysis_result = {"status": "failed", "error": str(e)}
                 
                 anomalies_detected[idx] = {
-                    "timestamp": normalized.get("vehicle", {}).get("timestamp_utc", "N/A"),
+                    "timestamp": packet.get("vehicle", {}).get("timestamp_utc", "N/A"),
                     "packet_index": idx,
                     "llm_analysis": analysis_result if enable_llm_analysis else None
                 }
@@ -258,7 +259,7 @@ def stream_and_process() -> None:
     second_counter = 0
 
     while user:
-        packet = normalize_packet(packets[idx])
+        packet = packets[idx]
         idx = (idx + 1) % total_packets
         second_counter += 1
 
@@ -1,7 +1,8 @@
 """
 FastAPI application for vehicle analysis and maintenance system
 """
-from fastapi import FastAPI, HTTPException
+from fastapi import APIRouter, FastAPI, HTTPException, Request, Response
+from fastapi.responses import ORJSONResponse
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel, Field, ConfigDict
 from typing import Optional
@@ -10,13 +11,19 @@ import os
 from datetime import datetime, UTC
 import threading
 import asyncio
-from collections import deque
+import logging
+import logging.handlers
+import queue
+from collections import OrderedDict, deque
 
-from agents_final import route_query, get_comprehensive_analysis, route_rca_capa
+import orjson
+
+from agents_final import route_query, get_comprehensive_analysis, route_rca_capa, close_llm_http_client
 from utils import VehicleDataManager, AnalysisLogger
-from fetch import load_packets, convert_decimal, normalize_packet
+from fetch import load_packets, convert_decimal
 from predefined_Rules import ruleGate, load_manufacturing_database
-from mongodb_handler import MongoDBHandler
+from mongodb_handler import MongoDBHandler, get_handler
+from shared_state import SharedCounters, STREAM_LEASE_RENEW_SEC
 from response_parser import structure_analysis_for_db, structure_rca_capa_for_db, structure_llm_response_for_db
 
 # Data source: newData.json (rich telemetry)
@@ -24,6 +31,24 @@ from response_parser import structure_analysis_for_db, structure_rca_capa_for_db
 SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
 DATASET_PATH = os.getenv("DATASET_PATH", os.path.join(SCRIPT_DIR, "dataset", "newData.json"))
 
+# ============================================================================
+# Logging - handlers only enqueue records; a listener thread writes them out
+# ============================================================================
+log_queue = queue.SimpleQueue()
+_log_stream_handler = logging.StreamHandler()
+_log_stream_handler.setFormatter(logging.Formatter("[%(name)s] %(levelname)s: %(message)s"))
+log_listener = logging.handlers.QueueListener(log_queue, _log_stream_handler)
+
+mongo_logger = logging.getLogger("mongodb_handler")
+mongo_logger.addHandler(logging.handlers.QueueHandler(log_queue))
+mongo_logger.setLevel(logging.INFO)
+mongo_logger.propagate = False
+
+shared_state_logger = logging.getLogger("shared_state")
+shared_state_logger.addHandler(logging.handlers.QueueHandler(log_queue))
+shared_state_logger.setLevel(logging.INFO)
+shared_state_logger.propagate = False
+
 # Initialize FastAPI app
 app = FastAPI(
     title="Vehicle Analysis & Maintenance System",
@@ -31,7 +56,60 @@ app = FastAPI(
     version="1.0.0"
 )
 
-# Add CORS middleware
+# ============================================================================
+# In-flight GET Deduplication
+# ============================================================================
+
+# Read-only endpoints polled by dashboards: identical concurrent requests share one response
+DEDUP_PATHS = ("/vehicles", "/status", "/anomalies")
+DEDUP_PATH_PREFIXES = ("/vehicle/",)
+_inflight_gets = {}
+
+
+def replay_response(body: bytes, status_code: int, raw_headers: list) -> Response:
+    """Rebuild a buffered response with its raw header list, so repeated headers (Set-Cookie, Vary) survive"""
+    response = Response(content=body, status_code=status_code)
+    response.raw_headers = list(raw_headers)
+    return response
+
+
+@app.middleware("http")
+async def deduplicate_inflight_gets(request: Request, call_next):
+    """
+    Singleflight for safe GETs: while a request is in flight, identical requests
+    (same path and query) await its result instead of repeating the work.
+    """
+    path = request.url.path
+    if request.method != "GET" or not (path in DEDUP_PATHS or path.startswith(DEDUP_PATH_PREFIXES)):
+        return await call_next(request)
+
+    key = (path, tuple(sorted(request.query_params.multi_items())))
+    pending = _inflight_gets.get(key)
+    if pending is not None:
+        # Shield so a disconnecting follower cannot cancel the shared future
+        shared = await asyncio.shield(pending)
+        if shared is None:
+            # Leader failed; serve this request independently
+            return await call_next(request)
+        return replay_response(*shared)
+
+    future = asyncio.get_running_loop().create_future()
+    _inflight_gets[key] = future
+    try:
+        response = await call_next(request)
+        body = b"".join([chunk async for chunk in response.body_iterator])
+        raw_headers = response.raw_headers
+        future.set_result((body, response.status_code, raw_headers))
+    finally:
+        if not future.done():
+            future.set_result(None)
+        del _inflight_gets[key]
+
+    return replay_response(body, response.status_code, raw_headers)
+
+
+# Add CORS middleware (registered last so it wraps deduplication and
+# per-request CORS headers are never shared between callers)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],
@@ -47,9 +125,26 @@ logger = AnalysisLogger()
 mongodb_handler: Optional[MongoDBHandler] = None
 
 
+def parse_fields(fields: Optional[str]) -> Optional[list]:
+    """Split a comma-separated ?fields= query value into a projection list (None = all fields)"""
+    if not fields:
+        return None
+    return [field.strip() for field in fields.split(",") if field.strip()] or None
+
+
+# Set once prepare_mongodb has finished clearing the previous run's data; until
+# then nothing is written, so the startup clear cannot drop fresh documents
+mongo_ready = threading.Event()
+
+
 def mongo_connected() -> bool:
-    """Safe check for MongoDB connection (handles None)."""
-    return bool(mongodb_handler and mongodb_handler.is_connected())
+    """Safe check for MongoDB connection (handles None); False until startup prep is done."""
+    return bool(mongo_ready.is_set() and mongodb_handler and mongodb_handler.is_connected())
+
+
+async def db_call(method, *args, **kwargs):
+    """Run a blocking MongoDBHandler method in a worker thread so the event loop keeps serving"""
+    return await asyncio.to_thread(method, *args, **kwargs)
 
 # Create logs directory
 LOGS_DIR = os.path.join(SCRIPT_DIR, "logs")
@@ -67,16 +162,127 @@ def print_anomaly_to_terminal(anomaly_idx: int, analysis: dict):
 # Global Data Buffer - Continuous Streaming Mode
 # ============================================================================
 processed_packets = []
-anomalies_detected = {}
+MAX_RETAINED_ANOMALIES = 500
+anomalies_detected = OrderedDict()  # packet_index -> anomaly document, oldest first, at most MAX_RETAINED_ANOMALIES
+anomalies_lock = threading.Lock()
+shared_counters = SharedCounters()  # Redis-backed when REDIS_URL is set, so totals agree across workers
 rolling_buffer = deque(maxlen=300)  # Last 5 minutes of data (1 packet/sec)
 current_packet_index = 0
 stream_active = False
 data_load_status = "pending"
 data_load_message = ""
 latest_analysis = None
+latest_analysis_bytes = b"null"  # orjson encoding of latest_analysis, refreshed on every update
 rca_capa_triggered = False  # Flag to track if RCA/CAPA has been triggered for current buffer
 
 
+def set_latest_analysis(analysis: dict):
+    """Replace latest_analysis and re-serialize it once for all status endpoints"""
+    global latest_analysis, latest_analysis_bytes
+    latest_analysis_bytes = orjson.dumps(analysis, default=str)
+    latest_analysis = analysis
+    shared_counters.publish_latest_analysis(latest_analysis_bytes)
+
+
+def json_with_raw(payload: dict, key: str, raw: bytes) -> Response:
+    """JSON response for payload with already-encoded JSON bytes spliced in under key"""
+    body = orjson.dumps(payload)[:-1] + b',"' + key.encode() + b'":' + raw + b"}"
+    return Response(content=body, media_type="application/json")
+
+
+def json_with_latest_analysis(payload: dict) -> Response:
+    """JSON response for payload with the cached latest_analysis bytes spliced in"""
+    return json_with_raw(payload, "latest_analysis", current_latest_analysis_bytes())
+
+
+def record_anomaly(anomaly_document: dict):
+    """
+    Store an anomaly in the ring and bump the running total
+
+    The ring holds one entry per packet: a re-analyzed packet replaces its
+    document in place and is not counted again, like the original dict.
+    """
+    packet_index = anomaly_document["packet_index"]
+    with anomalies_lock:
+        is_new = packet_index not in anomalies_detected
+        anomalies_detected[packet_index] = anomaly_document
+        if len(anomalies_detected) > MAX_RETAINED_ANOMALIES:
+            anomalies_detected.popitem(last=False)
+    shared_counters.publish_anomaly(anomaly_document, MAX_RETAINED_ANOMALIES)
+    if is_new:
+        shared_counters.incr("anomalies_detected")
+
+
+# With Redis only the lease holder streams; the other workers read the state it
+# publishes there, so every worker answers with the same buffer and anomalies.
+
+def serves_local_stream() -> bool:
+    """True when this worker's own globals hold the stream state"""
+    return stream_active or not shared_counters.shared
+
+
+def stream_running() -> bool:
+    """True when this worker streams, or another worker holds the stream lease"""
+    return stream_active or shared_counters.stream_leased()
+
+
+def buffer_snapshot() -> list:
+    """Packets in the rolling buffer, oldest first"""
+    # list() snapshots the deque atomically while the stream thread appends
+    return list(rolling_buffer) if serves_local_stream() else shared_counters.stream_buffer()
+
+
+def buffer_size() -> int:
+    """Number of packets in the rolling buffer"""
+    return len(rolling_buffer) if serves_local_stream() else shared_counters.stream_buffer_size()
+
+
+def retained_anomalies() -> list:
+    """Anomaly documents in the ring, oldest first"""
+    if serves_local_stream():
+        with anomalies_lock:
+            return list(anomalies_detected.values())
+    # The published list keeps every record; collapse it to one entry per packet
+    by_packet = {doc["packet_index"]: doc for doc in shared_counters.stream_anomalies()}
+    return list(by_packet.values())
+
+
+def current_latest_analysis_bytes() -> bytes:
+    """orjson encoding of the latest analysis"""
+    if serves_local_stream():
+        return latest_analysis_bytes
+    return shared_counters.latest_analysis() or b"null"
+
+
+def current_latest_analysis() -> Optional[dict]:
+    """The latest analysis as a dict, or None"""
+    if serves_local_stream():
+        return latest_analysis
+    return orjson.loads(current_latest_analysis_bytes())
+
+
+def total_anomalies() -> int:
+    """Anomalies detected since startup, including ones evicted from the ring"""
+    return shared_counters.get("anomalies_detected")
+
+
+def packets_processed() -> int:
+    """Packets streamed since startup"""
+    return shared_counters.get("packets_processed")
+
+
+def recent_anomalies(k: int) -> list:
+    """Return up to k most recent anomaly documents, oldest first"""
+    if k <= 0:
+        return []
+    return retained_anomalies()[-k:]
+
+
+def anomalies_by_packet() -> dict:
+    """Retained anomalies keyed by packet index, as expected by the agent context"""
+    return {doc["packet_index"]: doc for doc in retained_anomalies()}
+
+
 def load_data_stream():
     """Load packets once for streaming"""
     global processed_packets, data_load_status, data_load_message
@@ -108,14 +314,14 @@ async def trigger_rca_capa_analysis():
     Analyzes accumulated anomalies and provides root cause analysis and preventive actions.
     This runs asynchronously and stores results in MongoDB.
     """
-    global rolling_buffer, anomalies_detected, latest_analysis, rca_capa_triggered
+    global rolling_buffer, rca_capa_triggered
     
     try:
         analysis_context = {
             "processed_packets": list(rolling_buffer),
-            "anomalies_detected": anomalies_detected,
+            "anomalies_detected": anomalies_by_packet(),
             "total_packets": len(processed_packets),
-            "total_anomalies": len(anomalies_detected)
+            "total_anomalies": total_anomalies()
         }
         
         # Run RCA/CAPA analysis
@@ -132,9 +338,9 @@ async def trigger_rca_capa_analysis():
         # Create document for RCA/CAPA storage
         rca_capa_document = {
             "vehicle_id": "default",
-            "timestamp": datetime.now(UTC).isoformat(),
+            "timestamp": datetime.now(UTC),
             "buffer_size": len(rolling_buffer),
-            "anomalies_count": len(anomalies_detected),
+            "anomalies_count": total_anomalies(),
             "parsed_data": parsed_rca_capa,
             "affected_components": parsed_rca_capa.get("affected_components", []),
             "oem_owners": parsed_rca_capa.get("oem_owners", []),
@@ -150,7 +356,7 @@ async def trigger_rca_capa_analysis():
             llm_response_doc = {
                 "vehicle_id": "default",
                 "agent_type": "rca_capa",
-                "timestamp": datetime.now(UTC).isoformat(),
+                "timestamp": datetime.now(UTC),
                 "parsed_data": parsed_rca_capa,
                 "rca_capa_id": rca_id,
                 "raw_response_preview": raw_response[:200]
@@ -158,13 +364,13 @@ async def trigger_rca_capa_analysis():
             mongodb_handler.save_llm_response(llm_response_doc)
         
         # Update latest analysis
-        latest_analysis = {
+        set_latest_analysis({
             "timestamp": datetime.now().isoformat(),
             "agent": "rca_capa",
             "structured_data": parsed_rca_capa,
             "buffer_size": len(rolling_buffer),
-            "anomalies_analyzed": len(anomalies_detected)
-        }
+            "anomalies_analyzed": total_anomalies()
+        })
         
     except Exception as e:
         pass  # Silently log errors
@@ -176,7 +382,7 @@ def packet_stream_worker():
     Processes 1 packet per second, checks rules, and triggers analysis on anomalies.
     Triggers RCA/CAPA analysis when buffer reaches 20 items.
     """
-    global processed_packets, anomalies_detected, rolling_buffer, current_packet_index, stream_active, latest_analysis, rca_capa_triggered
+    global processed_packets, rolling_buffer, current_packet_index, stream_active, rca_capa_triggered
     
     if not processed_packets:
         return
@@ -190,19 +396,20 @@ def packet_stream_worker():
     loop = asyncio.new_event_loop()
     asyncio.set_event_loop(loop)
     
-    packet_counter = 0
     anomaly_counter = 0
     
     try:
         while stream_active:
             # Get packet cyclically
             idx = current_packet_index % len(processed_packets)
-            packet = normalize_packet(processed_packets[idx])
+            # Packets come from json.load (floats, never Decimal) and are only read
+            packet = processed_packets[idx]
             current_packet_index += 1
-            packet_counter += 1
+            shared_counters.incr("packets_processed")
             
             # Add to rolling buffer
             rolling_buffer.append(packet)
+            shared_counters.publish_packet(packet, rolling_buffer.maxlen)
             
             # Check predefined rules
             try:
@@ -221,7 +428,7 @@ def packet_stream_worker():
                     # Call agents with current buffer
                     analysis_context = {
                         "processed_packets": list(rolling_buffer),
-                        "anomalies_detected": anomalies_detected,
+                        "anomalies_detected": anomalies_by_packet(),
                         "total_packets": len(processed_packets),
                         "total_anomalies": anomaly_counter
                     }
@@ -239,13 +446,13 @@ def packet_stream_worker():
                     raw_response = result.get("response", "")
                     parsed_analysis = structure_analysis_for_db(raw_response)
 
-                    latest_analysis = {
+                    set_latest_analysis({
                         "timestamp": datetime.now().isoformat(),
                         "packet_index": idx,
                         "agent": result.get("agent"),
                         "structured_data": parsed_analysis,
                         "buffer_size": len(rolling_buffer)
-                    }
+                    })
 
                     # Only persist anomalies whose analysis severity contains 'warning'
                     severity_map = parsed_analysis.get("severity_summary", {}) if isinstance(parsed_analysis, dict) else {}
@@ -265,7 +472,7 @@ def packet_stream_worker():
                             "created_at": datetime.now(UTC).isoformat()
                         }
 
-                        anomalies_detected[idx] = anomaly_document
+                        record_anomaly(anomaly_document)
 
                         # Save to MongoDB
                         if mongo_connected():
@@ -304,6 +511,39 @@ def packet_stream_worker():
             loop.close()
 
 
+stream_thread: Optional[threading.Thread] = None
+stream_supervisor_stop = threading.Event()
+
+
+def start_stream() -> None:
+    """Run the packet stream on this worker (resumes a thread that is still winding down)"""
+    global stream_thread, stream_active
+    if stream_thread is not None and stream_thread.is_alive():
+        stream_active = True
+        return
+    stream_thread = threading.Thread(target=packet_stream_worker, daemon=True)
+    stream_thread.start()
+
+
+def stream_lease_supervisor() -> None:
+    """
+    Keep exactly one worker streaming when the lease lives in Redis.
+
+    The leader renews every STREAM_LEASE_RENEW_SEC from this thread, independent
+    of the stream thread, which can block on LLM calls for longer than the
+    lease TTL. Workers not streaming keep trying to acquire, so a lease orphaned
+    by a dead or stalled leader is taken over once it expires.
+    """
+    global stream_active
+    while not stream_supervisor_stop.wait(STREAM_LEASE_RENEW_SEC):
+        leading = stream_active and stream_thread is not None and stream_thread.is_alive()
+        if leading:
+            if not shared_counters.renew_stream_lease():
+                stream_active = False  # another worker holds the lease now
+        elif shared_counters.acquire_stream_lease():
+            start_stream()
+
+
 # ============================================================================
 # Request/Response Models
 # ============================================================================
@@ -371,52 +611,65 @@ class VehicleListResponse(BaseModel):
 # API Endpoints
 # ============================================================================
 
-@app.get("/")
+# Routes are grouped per feature; orjson renders every response
+streaming_router = APIRouter(tags=["streaming"], default_response_class=ORJSONResponse)
+anomaly_router = APIRouter(tags=["anomalies"], default_response_class=ORJSONResponse)
+rca_router = APIRouter(tags=["rca_capa"], default_response_class=ORJSONResponse)
+llm_router = APIRouter(tags=["llm_response"], default_response_class=ORJSONResponse)
+
+
+# Static part of the root payload, serialized once at import. The closing
+# brace is dropped so root() only has to append the live fields.
+ROOT_STATIC = {
+    "version": "1.0.0",
+    "dataset": DATASET_PATH,
+    "mode": "continuous-streaming with MongoDB",
+    "mongodb": "Enabled - All LLM anomaly data auto-saved",
+    "logs_directory": LOGS_DIR,
+    "note": "Data streams continuously. Anomaly analyses auto-saved to MongoDB.",
+    "endpoints": {
+        "GET /status": "System status and MongoDB info",
+        "GET /health": "API health check",
+        "GET /analyze": "Get all anomalies from MongoDB (handles empty gracefully)",
+        "POST /analyze": "Save anomaly data to MongoDB",
+        "GET /anomalies": "Get recent anomalies with fallback",
+        "GET /buffer-stats": "Get current buffer statistics",
+        "POST /query": "Ask about vehicle based on streaming data",
+        "POST /chat": "Get comprehensive analysis"
+    }
+}
+ROOT_STATIC_BYTES = orjson.dumps(ROOT_STATIC)[:-1]
+
+
+@streaming_router.get("/")
 async def root():
     """Root endpoint with API information"""
-    return {
-        "message": "Vehicle Analysis & Maintenance System API",
-        "version": "1.0.0",
-        "dataset": DATASET_PATH,
-        "mode": "continuous-streaming with MongoDB",
-        "mongodb": "Enabled - All LLM anomaly data auto-saved",
-        "status": data_load_status,
+    dynamic = orjson.dumps({
         "message": data_load_message,
-        "stream_active": stream_active,
-        "packets_processed": current_packet_index,
-        "anomalies_detected": len(anomalies_detected),
-        "latest_analysis": latest_analysis,
-        "logs_directory": LOGS_DIR,
-        "note": "Data streams continuously. Anomaly analyses auto-saved to MongoDB.",
-        "endpoints": {
-            "GET /status": "System status and MongoDB info",
-            "GET /health": "API health check",
-            "GET /analyze": "Get all anomalies from MongoDB (handles empty gracefully)",
-            "POST /analyze": "Save anomaly data to MongoDB",
-            "GET /anomalies": "Get recent anomalies with fallback",
-            "GET /buffer-stats": "Get current buffer statistics",
-            "POST /query": "Ask about vehicle based on streaming data",
-            "POST /chat": "Get comprehensive analysis"
-        }
-    }
+        "status": data_load_status,
+        "stream_active": stream_running(),
+        "packets_processed": packets_processed(),
+        "anomalies_detected": total_anomalies()
+    })
+    body = ROOT_STATIC_BYTES + b"," + dynamic[1:-1] + b',"latest_analysis":' + current_latest_analysis_bytes() + b"}"
+    return Response(content=body, media_type="application/json")
 
 
-@app.get("/buffer-stats")
+@streaming_router.get("/buffer-stats")
 async def buffer_statistics():
     """Get current streaming buffer statistics"""
-    return {
-        "stream_active": stream_active,
+    return json_with_latest_analysis({
+        "stream_active": stream_running(),
         "packets_loaded": len(processed_packets),
-        "packets_processed": current_packet_index,
-        "rolling_buffer_size": len(rolling_buffer),
-        "anomalies_detected": len(anomalies_detected),
-        "anomaly_indices": list(anomalies_detected.keys())[:20],
-        "latest_analysis": latest_analysis,
+        "packets_processed": packets_processed(),
+        "rolling_buffer_size": buffer_size(),
+        "anomalies_detected": total_anomalies(),
+        "anomaly_indices": [doc["packet_index"] for doc in retained_anomalies()[:20]],
         "note": "Data streams continuously at 1 packet/sec with real-time rule checking"
-    }
+    })
 
 
-@app.get("/status")
+@streaming_router.get("/status")
 async def system_status(limit: int = 50):
     """
     Get complete system status including MongoDB, stream, and all anomaly data
@@ -435,54 +688,54 @@ async def system_status(limit: int = 50):
     db_anomaly_count = 0
     
     if mongo_connected():
-        anomalies_list = mongodb_handler.get_all_anomalies(limit=limit)
-        db_anomaly_count = mongodb_handler.get_anomalies_count()
+        page = await db_call(mongodb_handler.get_anomalies_page, limit=limit)
+        anomalies_list, db_anomaly_count = page["items"], page["total"]
     
-    return {
+    return json_with_latest_analysis({
         "system": {
-            "stream_active": stream_active,
+            "stream_active": stream_running(),
             "mongodb_connected": mongo_connected(),
+            "mongodb_dropped_writes": mongodb_handler.dropped_writes if mongodb_handler else 0,
             "timestamp": datetime.now().isoformat()
         },
         "streaming": {
             "packets_loaded": len(processed_packets),
-            "packets_processed": current_packet_index,
-            "buffer_size": len(rolling_buffer),
+            "packets_processed": packets_processed(),
+            "buffer_size": buffer_size(),
             "data_source": DATASET_PATH
         },
         "statistics": {
-            "total_anomalies_detected": len(anomalies_detected),
+            "total_anomalies_detected": total_anomalies(),
             "total_anomalies_in_database": db_anomaly_count,
             "returned_count": len(anomalies_list),
             "status": "All LLM data auto-saved to MongoDB" if mongo_connected() else "MongoDB offline - using in-memory storage"
         },
-        "latest_analysis": latest_analysis,
         "anomalies": anomalies_list,
         "api_help": {
             "GET /status?limit=100": "Get status with more anomalies",
             "GET /analyze": "Get all anomalies from database",
             "POST /analyze": "Save new anomaly data"
         }
-    }
+    })
 
 
 
-@app.get("/health")
+@streaming_router.get("/health")
 async def health_check():
     """Health check endpoint"""
     return {
         "status": "healthy",
         "timestamp": datetime.now().isoformat(),
-        "stream_active": stream_active,
+        "stream_active": stream_running(),
         "packets_loaded": len(processed_packets),
-        "packets_processed": current_packet_index,
-        "buffer_size": len(rolling_buffer),
-        "anomalies_detected": len(anomalies_detected),
-        "latest_analysis_time": latest_analysis.get("timestamp") if latest_analysis else None
+        "packets_processed": packets_processed(),
+        "buffer_size": buffer_size(),
+        "anomalies_detected": total_anomalies(),
+        "latest_analysis_time": (current_latest_analysis() or {}).get("timestamp")
     }
 
 
-@app.get("/vehicles", response_model=VehicleListResponse)
+@streaming_router.get("/vehicles", response_model=VehicleListResponse, response_model_exclude_none=True)
 async def list_vehicles():
     """
     Get list of all available vehicles.
@@ -496,7 +749,7 @@ async def list_vehicles():
     }
 
 
-@app.get("/vehicle/{vehicle_id}")
+@streaming_router.get("/vehicle/{vehicle_id}")
 async def get_vehicle_data(vehicle_id: str):
     """
     Get complete data for a specific vehicle.
@@ -517,7 +770,7 @@ async def get_vehicle_data(vehicle_id: str):
     return vehicle_data
 
 
-@app.post("/query", response_model=AnalysisResponse)
+@streaming_router.post("/query", response_model=AnalysisResponse, response_model_exclude_none=True)
 async def query_vehicle(request: QueryRequest):
     """
     Ask a question about vehicle based on streaming data.
@@ -537,7 +790,7 @@ async def query_vehicle(request: QueryRequest):
     - "What was the latest anomaly detected?"
     """
     # Verify streaming is active
-    if not stream_active or not processed_packets:
+    if not stream_running() or not processed_packets:
         raise HTTPException(
             status_code=503,
             detail="Data stream not active. Check /health for status."
@@ -554,11 +807,11 @@ async def query_vehicle(request: QueryRequest):
     try:
         # Prepare context with live rolling buffer
         analysis_context = {
-            "processed_packets": list(rolling_buffer),  # Current rolling buffer
-            "anomalies_detected": anomalies_detected,
-            "total_packets": current_packet_index,
-            "total_anomalies": len(anomalies_detected),
-            "latest_analysis": latest_analysis
+            "processed_packets": buffer_snapshot(),  # Current rolling buffer
+            "anomalies_detected": anomalies_by_packet(),
+            "total_packets": packets_processed(),
+            "total_anomalies": total_anomalies(),
+            "latest_analysis": current_latest_analysis()
         }
         
         # Route query to appropriate agent
@@ -576,8 +829,8 @@ async def query_vehicle(request: QueryRequest):
             "query": request.query,
             "agent": result["agent"],
             "response": result["response"],
-            "packets_in_buffer": len(rolling_buffer),
-            "anomalies_detected": len(anomalies_detected)
+            "packets_in_buffer": buffer_size(),
+            "anomalies_detected": total_anomalies()
         }
         logger.save_analysis(log_entry)
         
@@ -595,7 +848,7 @@ async def query_vehicle(request: QueryRequest):
         )
 
 
-@app.post("/analyze")
+@anomaly_router.post("/analyze")
 async def comprehensive_analysis(request: ComprehensiveAnalysisRequest):
     """
     Get comprehensive analysis of current vehicle state.
@@ -604,7 +857,7 @@ async def comprehensive_analysis(request: ComprehensiveAnalysisRequest):
     Runs all diagnostic, maintenance, and performance agents.
     """
     # Verify streaming is active
-    if not stream_active or not processed_packets:
+    if not stream_running() or not processed_packets:
         raise HTTPException(
             status_code=503,
             detail="Data stream not active. Check /health for status."
@@ -621,10 +874,10 @@ async def comprehensive_analysis(request: ComprehensiveAnalysisRequest):
     try:
         # Prepare context with live rolling buffer
         analysis_context = {
-            "processed_packets": list(rolling_buffer),
-            "anomalies_detected": anomalies_detected,
-            "total_packets": current_packet_index,
-            "total_anomalies": len(anomalies_detected)
+            "processed_packets": buffer_snapshot(),
+            "anomalies_detected": anomalies_by_packet(),
+            "total_packets": packets_processed(),
+            "total_anomalies": total_anomalies()
         }
         
         # Get comprehensive analysis
@@ -640,8 +893,8 @@ async def comprehensive_analysis(request: ComprehensiveAnalysisRequest):
             "vehicle_id": request.vehicle_id,
             "type": "comprehensive_analysis",
             "result": result,
-            "packets_in_buffer": len(rolling_buffer),
-            "anomalies_detected": len(anomalies_detected)
+            "packets_in_buffer": buffer_size(),
+            "anomalies_detected": total_anomalies()
         }
         logger.save_analysis(log_entry)
         
@@ -649,8 +902,8 @@ async def comprehensive_analysis(request: ComprehensiveAnalysisRequest):
             "vehicle_id": request.vehicle_id,
             "timestamp": datetime.now().isoformat(),
             "analysis": result,
-            "packets_in_buffer": len(rolling_buffer),
-            "anomalies_detected": len(anomalies_detected)
+            "packets_in_buffer": buffer_size(),
+            "anomalies_detected": total_anomalies()
         }
     
     except Exception as e:
@@ -660,8 +913,8 @@ async def comprehensive_analysis(request: ComprehensiveAnalysisRequest):
         )
 
 
-@app.get("/analyze")
-async def get_all_anomalies(vehicle_id: Optional[str] = None, limit: int = 100):
+@anomaly_router.get("/analyze")
+async def get_all_anomalies(vehicle_id: Optional[str] = None, limit: int = 100, fields: Optional[str] = None):
     """
     Get all detected anomalies from MongoDB
     
@@ -671,6 +924,7 @@ async def get_all_anomalies(vehicle_id: Optional[str] = None, limit: int = 100):
     Args:
         vehicle_id: Optional filter by vehicle ID
         limit: Maximum number of anomalies to return (default: 100)
+        fields: Optional comma-separated fields to return, e.g. "timestamp,packet_index" (default: all)
     
     Returns:
         List of all anomalies with their analysis
@@ -685,20 +939,22 @@ async def get_all_anomalies(vehicle_id: Optional[str] = None, limit: int = 100):
         }
     
     try:
-        # Fetch anomalies from MongoDB
-        anomalies = mongodb_handler.get_all_anomalies(limit=limit, vehicle_id=vehicle_id)
-        
-        # Get total count
-        total_count = mongodb_handler.get_anomalies_count(vehicle_id=vehicle_id)
+        # Fetch anomalies and total count from MongoDB in one query
+        page = await db_call(
+            mongodb_handler.get_anomalies_page,
+            vehicle_id=vehicle_id,
+            limit=limit,
+            fields=parse_fields(fields),
+            as_json=True
+        )
         
-        return {
+        return json_with_raw({
             "status": "success",
-            "total_anomalies": total_count,
-            "returned_count": len(anomalies),
+            "total_anomalies": page["total"],
+            "returned_count": page["count"],
             "vehicle_id": vehicle_id,
-            "anomalies": anomalies,
             "timestamp": datetime.now().isoformat()
-        }
+        }, "anomalies", page["items"])
     
     except Exception as e:
         return {
@@ -708,7 +964,7 @@ async def get_all_anomalies(vehicle_id: Optional[str] = None, limit: int = 100):
         }
 
 
-@app.post("/analyze")
+@anomaly_router.post("/analyze")
 async def save_anomaly_to_db(request: AnomalyPostRequest):
     """
     Save anomaly data directly to MongoDB
@@ -762,8 +1018,8 @@ async def save_anomaly_to_db(request: AnomalyPostRequest):
                 except Exception:
                     pass  # Silent error handling
         
-        # Save to MongoDB
-        anomaly_id = mongodb_handler.save_anomaly(anomaly_document)
+        # Written before responding, so a returned ID means the document is stored
+        anomaly_id = await db_call(mongodb_handler.save_anomaly, anomaly_document, sync=True)
         
         if not anomaly_id:
             return {
@@ -788,10 +1044,10 @@ async def save_anomaly_to_db(request: AnomalyPostRequest):
         }
 
 
-@app.get("/anomalies")
+@anomaly_router.get("/anomalies")
 async def get_anomalies():
     """Get all detected anomalies with their analysis (from MongoDB if available, else in-memory)"""
-    if not stream_active:
+    if not stream_running():
         raise HTTPException(
             status_code=503,
             detail="Data stream not active."
@@ -800,37 +1056,35 @@ async def get_anomalies():
     # Try to get from MongoDB first
     if mongo_connected():
         try:
-            anomalies = mongodb_handler.get_all_anomalies(limit=50)
-            total_count = mongodb_handler.get_anomalies_count()
+            page = await db_call(mongodb_handler.get_anomalies_page, limit=50)
+            anomalies, total_count = page["items"], page["total"]
             
-            return {
+            return json_with_latest_analysis({
                 "total_anomalies": total_count,
                 "recent_anomalies": anomalies,
                 "source": "MongoDB",
-                "latest_analysis": latest_analysis,
                 "timestamp": datetime.now().isoformat()
-            }
+            })
         except Exception as e:
             pass  # Silently handle MongoDB errors
     
     # Fall back to in-memory storage
     anomaly_list = []
-    for idx, anomaly_data in list(anomalies_detected.items())[:50]:  # Last 50 anomalies
+    for anomaly_data in recent_anomalies(50):  # Last 50 anomalies
         anomaly_list.append({
-            "packet_index": idx,
+            "packet_index": anomaly_data.get("packet_index"),
             "timestamp": anomaly_data.get("timestamp"),
             "analysis": anomaly_data.get("analysis")
         })
     
-    return {
-        "total_anomalies": len(anomalies_detected),
+    return json_with_latest_analysis({
+        "total_anomalies": total_anomalies(),
         "recent_anomalies": anomaly_list,
-        "latest_analysis": latest_analysis,
         "logs_directory": LOGS_DIR
-    }
+    })
 
 
-@app.get("/analysis/{anomaly_id}")
+@anomaly_router.get("/analysis/{anomaly_id}")
 async def get_analysis_report(anomaly_id: int):
     """Get full analysis report for a specific anomaly"""
     log_file = os.path.join(LOGS_DIR, f"anomaly_{anomaly_id}_analysis.txt")
@@ -869,33 +1123,49 @@ async def save_anomaly_legacy(anomaly_data: dict):
     }
 
 
-@app.get("/anomalies-summary")
+@anomaly_router.get("/anomalies-summary")
 async def get_anomalies_summary():
-    """Get summary of all detected anomalies (In-memory)"""
-    if not anomalies_detected:
+    """Get summary of all detected anomalies (from MongoDB if available, else in-memory)"""
+    if mongo_connected():
+        # Projection, preview truncation and sorting all happen server-side
+        summaries = await db_call(mongodb_handler.get_anomalies_summary, limit=MAX_RETAINED_ANOMALIES)
+        anomaly_total = await db_call(mongodb_handler.get_anomalies_count)
+        summary_data = [
+            {
+                "anomaly_number": number,
+                "packet_index": summary.get("packet_index"),
+                "timestamp": summary.get("timestamp"),
+                "agent": summary.get("agent"),
+                "response_preview": summary.get("response_preview", "N/A")
+            }
+            for number, summary in enumerate(summaries, start=1)
+        ]
+    else:
+        anomaly_total = total_anomalies()
+        summary_data = []
+        for data in sorted(retained_anomalies(), key=lambda doc: doc["packet_index"]):
+            summary_data.append({
+                "anomaly_number": len(summary_data) + 1,
+                "packet_index": data["packet_index"],
+                "timestamp": data.get('timestamp'),
+                "agent": data.get('analysis', {}).get('agent'),
+                "response_preview": data.get('analysis', {}).get('response', 'N/A')[:200]
+            })
+    
+    if not summary_data:
         return {
             "total_anomalies": 0,
             "message": "No anomalies detected yet"
         }
     
-    summary_data = []
-    for idx, data in sorted(anomalies_detected.items()):
-        summary_data.append({
-            "anomaly_number": len(summary_data) + 1,
-            "packet_index": idx,
-            "timestamp": data.get('timestamp'),
-            "agent": data.get('analysis', {}).get('agent'),
-            "response_preview": data.get('analysis', {}).get('response', 'N/A')[:200]
-        })
-    
     return {
-        "total_anomalies": len(anomalies_detected),
+        "total_anomalies": anomaly_total,
         "anomalies": summary_data,
         "generated_at": datetime.now().isoformat()
     }
 
 
-@app.get("/history/{vehicle_id}")
+@streaming_router.get("/history/{vehicle_id}")
 async def get_vehicle_history(vehicle_id: str, limit: int = 10):
     """
     Get analysis history for a specific vehicle.
@@ -919,7 +1189,7 @@ async def get_vehicle_history(vehicle_id: str, limit: int = 10):
 # RCA/CAPA ENDPOINTS
 # ============================================================================
 
-@app.post("/rca_capa")
+@rca_router.post("/rca_capa")
 async def trigger_rca_capa():
     """
     Manually trigger RCA/CAPA analysis using current buffer data.
@@ -931,7 +1201,7 @@ async def trigger_rca_capa():
         RCA/CAPA analysis with parsed root causes and recommended actions
     """
     # Verify streaming is active
-    if not stream_active or not processed_packets:
+    if not stream_running() or not processed_packets:
         raise HTTPException(
             status_code=503,
             detail="Data stream not active. Check /health for status."
@@ -943,10 +1213,10 @@ async def trigger_rca_capa():
             vehicle_id="default",
             data_manager=data_manager,
             analysis_context={
-                "processed_packets": list(rolling_buffer),
-                "anomalies_detected": anomalies_detected,
-                "total_packets": current_packet_index,
-                "total_anomalies": len(anomalies_detected)
+                "processed_packets": buffer_snapshot(),
+                "anomalies_detected": anomalies_by_packet(),
+                "total_packets": packets_processed(),
+                "total_anomalies": total_anomalies()
             }
         )
         
@@ -957,9 +1227,9 @@ async def trigger_rca_capa():
         # Create RCA/CAPA document
         rca_capa_document = {
             "vehicle_id": "default",
-            "timestamp": datetime.now(UTC).isoformat(),
-            "buffer_size": len(rolling_buffer),
-            "anomalies_count": len(anomalies_detected),
+            "timestamp": datetime.now(UTC),
+            "buffer_size": buffer_size(),
+            "anomalies_count": total_anomalies(),
             "manual_trigger": True,
             "parsed_data": parsed_rca_capa,
             "affected_components": parsed_rca_capa.get("affected_components", []),
@@ -967,28 +1237,28 @@ async def trigger_rca_capa():
             "safety_criticality": parsed_rca_capa.get("safety_criticality", "Unknown")
         }
         
-        # Save to MongoDB
+        # Written before responding, so a returned ID means the document is stored
         rca_id = None
         if mongo_connected():
-            rca_id = mongodb_handler.save_rca_capa(rca_capa_document)
+            rca_id = await db_call(mongodb_handler.save_rca_capa, rca_capa_document, sync=True)
             
             # Also save as LLM response
             llm_response_doc = {
                 "vehicle_id": "default",
                 "agent_type": "rca_capa",
-                "timestamp": datetime.now(UTC).isoformat(),
+                "timestamp": datetime.now(UTC),
                 "manual_trigger": True,
                 "parsed_data": parsed_rca_capa,
                 "rca_capa_id": rca_id
             }
-            mongodb_handler.save_llm_response(llm_response_doc)
+            await db_call(mongodb_handler.save_llm_response, llm_response_doc, sync=True)
         
         return {
             "status": "success",
             "vehicle_id": "default",
             "timestamp": datetime.now().isoformat(),
-            "buffer_size": len(rolling_buffer),
-            "anomalies_analyzed": len(anomalies_detected),
+            "buffer_size": buffer_size(),
+            "anomalies_analyzed": total_anomalies(),
             "rca_capa_id": rca_id,
             "analysis": parsed_rca_capa
         }
@@ -1000,8 +1270,8 @@ async def trigger_rca_capa():
         )
 
 
-@app.get("/rca_capa")
-async def get_rca_capa_data(vehicle_id: Optional[str] = None, oem_owner: Optional[str] = None, limit: int = 100):
+@rca_router.get("/rca_capa")
+async def get_rca_capa_data(vehicle_id: Optional[str] = None, oem_owner: Optional[str] = None, limit: int = 100, fields: Optional[str] = None):
     """
     Get all RCA/CAPA analyses from MongoDB
     
@@ -1009,6 +1279,7 @@ async def get_rca_capa_data(vehicle_id: Optional[str] = None, oem_owner: Optiona
         vehicle_id: Optional filter by vehicle ID
         oem_owner: Optional filter by OEM team owner
         limit: Maximum number to return (default: 100)
+        fields: Optional comma-separated fields to return (default: all)
     
     Returns:
         List of RCA/CAPA analyses with root causes and preventive actions
@@ -1021,26 +1292,23 @@ async def get_rca_capa_data(vehicle_id: Optional[str] = None, oem_owner: Optiona
         }
     
     try:
-        analyses = mongodb_handler.get_rca_capa_analyses(
+        page = await db_call(
+            mongodb_handler.get_rca_capa_page,
             vehicle_id=vehicle_id or "default",
             limit=limit,
-            oem_owner=oem_owner
+            oem_owner=oem_owner,
+            fields=parse_fields(fields),
+            as_json=True
         )
         
-        total_count = mongodb_handler.get_rca_capa_count(
-            vehicle_id=vehicle_id or "default",
-            oem_owner=oem_owner
-        )
-        
-        return {
+        return json_with_raw({
             "status": "success",
-            "total_rca_capa_analyses": total_count,
-            "returned_count": len(analyses),
+            "total_rca_capa_analyses": page["total"],
+            "returned_count": page["count"],
             "vehicle_id": vehicle_id or "default",
             "oem_owner_filter": oem_owner,
-            "rca_capa_analyses": analyses,
             "timestamp": datetime.now().isoformat()
-        }
+        }, "rca_capa_analyses", page["items"])
     
     except Exception as e:
         return {
@@ -1050,11 +1318,7 @@ async def get_rca_capa_data(vehicle_id: Optional[str] = None, oem_owner: Optiona
         }
 
 
-# ============================================================================
-# LLM RESPONSE ENDPOINTS
-# ============================================================================
-
-@app.get("/rca_capa_debug")
+@rca_router.get("/rca_capa_debug")
 async def get_rca_capa_debug(limit: int = 10):
     """
     DEBUG ENDPOINT: Get raw response previews from RCA/CAPA analyses
@@ -1068,7 +1332,7 @@ async def get_rca_capa_debug(limit: int = 10):
         }
     
     try:
-        analyses = mongodb_handler.get_rca_capa_analyses(vehicle_id="default", limit=limit)
+        analyses = await db_call(mongodb_handler.get_rca_capa_analyses, vehicle_id="default", limit=limit)
         
         debug_data = []
         for analysis in analyses:
@@ -1096,7 +1360,11 @@ async def get_rca_capa_debug(limit: int = 10):
         }
 
 
-@app.post("/llm_response")
+# ============================================================================
+# LLM RESPONSE ENDPOINTS
+# ============================================================================
+
+@llm_router.post("/llm_response")
 async def save_llm_response_data(request: QueryRequest):
     """
     Save a detailed LLM response in parsed format to MongoDB.
@@ -1110,7 +1378,7 @@ async def save_llm_response_data(request: QueryRequest):
     Returns:
         Saved LLM response document ID and parsed data
     """
-    if not stream_active or not processed_packets:
+    if not stream_running() or not processed_packets:
         raise HTTPException(
             status_code=503,
             detail="Data stream not active. Check /health for status."
@@ -1129,10 +1397,10 @@ async def save_llm_response_data(request: QueryRequest):
             vehicle_id=request.vehicle_id,
             data_manager=data_manager,
             analysis_context={
-                "processed_packets": list(rolling_buffer),
-                "anomalies_detected": anomalies_detected,
-                "total_packets": current_packet_index,
-                "total_anomalies": len(anomalies_detected)
+                "processed_packets": buffer_snapshot(),
+                "anomalies_detected": anomalies_by_packet(),
+                "total_packets": packets_processed(),
+                "total_anomalies": total_anomalies()
             }
         )
         
@@ -1146,14 +1414,14 @@ async def save_llm_response_data(request: QueryRequest):
             "vehicle_id": request.vehicle_id,
             "agent_type": agent_type,
             "query": request.query,
-            "timestamp": datetime.now(UTC).isoformat(),
-            "buffer_size": len(rolling_buffer),
-            "anomalies_count": len(anomalies_detected),
+            "timestamp": datetime.now(UTC),
+            "buffer_size": buffer_size(),
+            "anomalies_count": total_anomalies(),
             "parsed_data": parsed_data
         }
         
-        # Save to MongoDB
-        llm_id = mongodb_handler.save_llm_response(llm_response_doc)
+        # Written before responding, so a returned ID means the document is stored
+        llm_id = await db_call(mongodb_handler.save_llm_response, llm_response_doc, sync=True)
         
         return {
             "status": "success",
@@ -1171,8 +1439,8 @@ async def save_llm_response_data(request: QueryRequest):
         )
 
 
-@app.get("/llm_response")
-async def get_llm_responses(vehicle_id: Optional[str] = None, agent_type: Optional[str] = None, limit: int = 100):
+@llm_router.get("/llm_response")
+async def get_llm_responses(vehicle_id: Optional[str] = None, agent_type: Optional[str] = None, limit: int = 100, fields: Optional[str] = None):
     """
     Get all parsed LLM responses from MongoDB
     
@@ -1180,6 +1448,7 @@ async def get_llm_responses(vehicle_id: Optional[str] = None, agent_type: Option
         vehicle_id: Optional filter by vehicle ID
         agent_type: Optional filter by agent type (diagnostic, maintenance, performance, rca_capa)
         limit: Maximum number to return (default: 100)
+        fields: Optional comma-separated fields to return (default: all)
     
     Returns:
         List of parsed LLM responses in structured JSON format
@@ -1192,26 +1461,23 @@ async def get_llm_responses(vehicle_id: Optional[str] = None, agent_type: Option
         }
     
     try:
-        responses = mongodb_handler.get_llm_responses(
+        page = await db_call(
+            mongodb_handler.get_llm_responses_page,
             vehicle_id=vehicle_id or "default",
             agent_type=agent_type,
-            limit=limit
-        )
-        
-        total_count = mongodb_handler.get_llm_responses_count(
-            vehicle_id=vehicle_id or "default",
-            agent_type=agent_type
+            limit=limit,
+            fields=parse_fields(fields),
+            as_json=True
         )
         
-        return {
+        return json_with_raw({
             "status": "success",
-            "total_llm_responses": total_count,
-            "returned_count": len(responses),
+            "total_llm_responses": page["total"],
+            "returned_count": page["count"],
             "vehicle_id": vehicle_id or "default",
             "agent_type_filter": agent_type,
-            "llm_responses": responses,
             "timestamp": datetime.now().isoformat()
-        }
+        }, "llm_responses", page["items"])
     
     except Exception as e:
         return {
@@ -1221,10 +1487,38 @@ async def get_llm_responses(vehicle_id: Optional[str] = None, agent_type: Option
         }
 
 
+app.include_router(streaming_router)
+app.include_router(anomaly_router)
+app.include_router(rca_router)
+app.include_router(llm_router)
+
+
 # ============================================================================
 # Run the application
 # ============================================================================
 
+mongo_startup_task: Optional[asyncio.Task] = None
+
+
+def prepare_mongodb(handler: MongoDBHandler):
+    """
+    Connect, build indexes and clear data from the previous run (off the startup path).
+    Sets mongo_ready when done, whatever the outcome, which opens MongoDB to callers.
+    """
+    try:
+        if not handler.mongodb_uri:
+            return
+        if handler.client is None and not handler.try_connect():
+            return
+        handler.clear_all_anomalies()
+        handler.clear_all_rca_capa()
+        handler.clear_all_llm_responses()
+    except Exception:
+        pass
+    finally:
+        mongo_ready.set()
+
+
 @asynccontextmanager
 async def lifespan(app):
     """Lifespan handler: initialize resources on startup and yield control.
@@ -1232,29 +1526,37 @@ async def lifespan(app):
     This replaces the deprecated @app.on_event("startup"). It ensures
     MongoDBHandler is created exactly once and streaming is started.
     """
-    # Create MongoDB handler now (deferred) and clear old data
-    global mongodb_handler
-    if mongodb_handler is None:
-        mongodb_handler = MongoDBHandler()
-
-    if mongo_connected():
-        try:
-            mongodb_handler.clear_all_anomalies()
-            mongodb_handler.clear_all_rca_capa()
-            mongodb_handler.clear_all_llm_responses()
-        except Exception:
-            pass
+    log_listener.start()
+    
+    # Create MongoDB handler now (deferred); connecting, index builds and clearing
+    # old data run in a thread so the server starts accepting requests immediately
+    global mongodb_handler, mongo_startup_task
+    mongodb_handler = get_handler(connect=False)
+    mongo_startup_task = asyncio.create_task(asyncio.to_thread(prepare_mongodb, mongodb_handler))
 
-    # Load packets from file and start background worker
+    # Load packets from file; only the worker holding the stream lease runs the stream
     if load_data_stream():
-        stream_thread = threading.Thread(target=packet_stream_worker, daemon=True)
-        stream_thread.start()
+        if shared_counters.acquire_stream_lease():
+            shared_counters.reset("packets_processed", "anomalies_detected")
+            shared_counters.clear_stream_state()
+            start_stream()
+        if shared_counters.shared:
+            threading.Thread(target=stream_lease_supervisor, daemon=True).start()
 
     try:
         yield
     finally:
-        # Optional cleanup can be added here
-        pass
+        stream_supervisor_stop.set()
+        shared_counters.release_stream_lease()
+        # Let an in-progress connect/clear finish before closing the handler under it
+        if mongo_startup_task is not None:
+            await asyncio.gather(mongo_startup_task, return_exceptions=True)
+        # Write out anything still queued in the MongoDB batch writer
+        if mongodb_handler is not None:
+            await asyncio.to_thread(mongodb_handler.close)
+        log_listener.stop()
+        # Release pooled LLM connections
+        await close_llm_http_client()
 
 # Attach lifespan handler to the FastAPI app router to avoid on_event deprecation
 app.router.lifespan_context = lifespan
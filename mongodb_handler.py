@@ -3,114 +3,655 @@ MongoDB handler for storing and retrieving anomaly data
 Simple integration - just requires MONGODB_URI in .env
 """
 
-from pymongo import MongoClient
-from pymongo.errors import ServerSelectionTimeoutError
+from pymongo import DeleteMany, MongoClient, WriteConcern
+from pymongo.errors import BulkWriteError, OperationFailure, ServerSelectionTimeoutError
+from bson.codec_options import CodecOptions, TypeDecoder, TypeRegistry
+from bson.objectid import ObjectId
+from collections import OrderedDict, deque
+from copy import deepcopy
+from itertools import islice
 from datetime import datetime, UTC
+import logging
+import orjson
 import os
-from typing import List, Dict, Optional
+import re
+import threading
+import time
+from typing import Any, List, Dict, Optional, Tuple
+
+logger = logging.getLogger("mongodb_handler")
+
+NOT_CONNECTED_WARN_INTERVAL_SEC = 30.0
+_OBJECT_ID_RE = re.compile(r'^[0-9a-fA-F]{24}$')
+READ_CACHE_MAXSIZE = 512
+READ_CACHE_TTL_SEC = 5.0
+PING_INTERVAL_SEC = 10.0
+WRITE_BATCH_SIZE = 200
+WRITE_FLUSH_INTERVAL_SEC = 0.05
+WRITE_MAX_RETRIES = 5
+WRITE_RETRY_BACKOFF_SEC = 0.5
+DUPLICATE_KEY_ERROR = 11000
+DELETE_CHUNK_SIZE = 1000
+RECENT_MIRROR_SIZE = 1000
+MIRROR_RETRY_SEC = 5.0
+
+class ObjectIdAsStrDecoder(TypeDecoder):
+    """Decode ObjectId values to hex strings inside the BSON decoder, so results are JSON-ready"""
+    bson_type = ObjectId
+    
+    def transform_bson(self, value):
+        return str(value)
+
+
+CODEC_OPTIONS = CodecOptions(tz_aware=True, tzinfo=UTC, type_registry=TypeRegistry([ObjectIdAsStrDecoder()]))
+
+
+def _as_bson_date(value: Any) -> Any:
+    """
+    Convert an ISO-8601 timestamp string to an aware datetime
+    
+    Stored as a BSON Date (int64), timestamps sort and index by binary compare
+    instead of string compare. Values that are not ISO strings (e.g. "N/A")
+    are returned unchanged.
+    """
+    if isinstance(value, str):
+        try:
+            value = datetime.fromisoformat(value)
+        except ValueError:
+            return value
+    if isinstance(value, datetime) and value.tzinfo is None:
+        value = value.replace(tzinfo=UTC)
+    return value
+
+
+def _sort_timestamp(doc: Dict) -> Tuple:
+    """Sort key matching Mongo's order for 'timestamp': dates above strings above missing"""
+    value = doc.get('timestamp')
+    if isinstance(value, datetime):
+        return (2, value)
+    if isinstance(value, str):
+        return (1, value)
+    return (0,)
+
+
+# Connection pool sizing: the stream thread, batch writer and endpoint threads share one client
+POOL_MAX_SIZE = int(os.getenv("MONGODB_MAX_POOL_SIZE", "200"))
+POOL_MIN_SIZE = int(os.getenv("MONGODB_MIN_POOL_SIZE", "10"))
+
+
+def _available_compressors() -> str:
+    """Wire compressors PyMongo can use here, best first (zlib is always built in)"""
+    compressors = []
+    try:
+        import zstandard  # noqa: F401
+        compressors.append('zstd')
+    except ImportError:
+        pass
+    try:
+        import snappy  # noqa: F401
+        compressors.append('snappy')
+    except ImportError:
+        pass
+    compressors.append('zlib')
+    return ','.join(compressors)
+
+
+# Indexes per collection, matching the (filter, sort) shape of the read queries
+INDEXES = {
+    'anomalies': [
+        [('vehicle_id', 1), ('timestamp', -1)],
+        [('timestamp', -1)],
+        [('packet_index', 1)],
+    ],
+    'rca_capa': [
+        [('vehicle_id', 1), ('timestamp', -1)],
+        [('oem_owner', 1), ('timestamp', -1)],
+    ],
+    'llm_responses': [
+        [('vehicle_id', 1), ('agent_type', 1), ('timestamp', -1)],
+        [('agent_type', 1), ('timestamp', -1)],
+    ],
+}
+
+
+class _ReadCache:
+    """
+    Small thread-safe LRU cache with a TTL for read query results
+    
+    Keys are tuples whose first element is the collection name, so writes can
+    invalidate just the entries of the collection they touched.
+    """
+    
+    def __init__(self, maxsize: int = READ_CACHE_MAXSIZE, ttl: float = READ_CACHE_TTL_SEC):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries: "OrderedDict[Tuple, Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def get(self, key: Tuple) -> Any:
+        """Return the cached value, or None if missing or expired"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+    
+    def put(self, key: Tuple, value: Any) -> None:
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+    
+    def invalidate(self, collection: str) -> None:
+        """Drop every cached entry for one collection"""
+        with self._lock:
+            for key in [k for k in self._entries if k[0] == collection]:
+                del self._entries[key]
+
 
 class MongoDBHandler:
-    def __init__(self, mongodb_uri: Optional[str] = None):
+    def __init__(self, mongodb_uri: Optional[str] = None, connect: bool = True):
         """
         Initialize MongoDB connection
         
         Args:
             mongodb_uri: MongoDB connection string. If None, reads from MONGODB_URI env var
+            connect: Connect immediately. With False the handler reports not-connected
+                until try_connect() is called (e.g. from a background thread)
         """
         self.mongodb_uri = mongodb_uri or os.getenv("MONGODB_URI")
         self.client = None
         self.db = None
         self.anomalies_collection = None
+        self._read_cache = _ReadCache()
+        self._last_ping_ok = False
+        self._last_ping_ts = 0.0
+        self._ping_interval = PING_INTERVAL_SEC
+        # Pending inserts per collection, drained by the flusher thread via insert_many
+        self._write_queues = {'anomalies': deque(), 'rca_capa': deque(), 'llm_responses': deque()}
+        self._write_retries = {name: 0 for name in self._write_queues}  # failed attempts of the head batch
+        self._write_retry_at = {name: 0.0 for name in self._write_queues}
+        self.dropped_writes = 0  # queued documents given up on after WRITE_MAX_RETRIES
+        self._flush_lock = threading.Lock()
+        self._flusher_stop = threading.Event()
+        self._flusher = None
+        self._ready_indexes = set()  # (collection, keys) pairs known to exist, safe to hint
+        # Newest anomalies kept current by a change stream, so polling reads skip Mongo
+        self._recent = deque()
+        self._recent_ids = set()
+        self._recent_total = 0
+        self._recent_version = 0
+        self._mirror_live = False
+        self._mirror_lock = threading.Lock()
+        self._mirror_stop = threading.Event()
+        self._watcher = None
+        self._last_not_connected_warning = 0.0
         
         if not self.mongodb_uri:
-            print("[MONGODB] WARNING: MONGODB_URI not set. Please add it to .env")
+            logger.warning("MONGODB_URI not set. Please add it to .env")
             return
         
+        if connect:
+            self.try_connect()
+    
+    def try_connect(self) -> bool:
+        """
+        Connect, logging failures instead of raising
+        
+        Returns:
+            True if connected
+        """
         try:
             self.connect()
-            print("[MONGODB] Successfully connected to MongoDB")
+            logger.info("Successfully connected to MongoDB")
+            return True
         except Exception as e:
-            print(f"[MONGODB] Failed to connect: {e}")
+            logger.error("Failed to connect: %s", e)
+            return False
     
     def connect(self):
-        """Establish MongoDB connection"""
+        """
+        Establish MongoDB connection
+        
+        Blocks on the initial ping and index creation. self.client is only set
+        once everything is ready, so concurrent callers see "not connected"
+        rather than half-initialized collections.
+        """
         if not self.mongodb_uri:
             raise ValueError("MONGODB_URI not set")
         
-        self.client = MongoClient(
+        client = MongoClient(
             self.mongodb_uri,
             serverSelectionTimeoutMS=5000,
-            connectTimeoutMS=10000
+            connectTimeoutMS=10000,
+            maxPoolSize=POOL_MAX_SIZE,
+            minPoolSize=POOL_MIN_SIZE,
+            maxIdleTimeMS=60000,
+            waitQueueTimeoutMS=2000,
+            retryWrites=True,
+            compressors=_available_compressors()
         )
         
         # Test connection
-        self.client.admin.command('ping')
+        client.admin.command('ping')
         
         # Get database and collections
-        self.db = self.client['vehicle_analysis']
-        self.anomalies_collection = self.db['anomalies']
-        self.rca_capa_collection = self.db['rca_capa']
-        self.llm_responses_collection = self.db['llm_responses']
-        
-        # Create indexes for faster queries
-        self.anomalies_collection.create_index('timestamp')
-        self.anomalies_collection.create_index('vehicle_id')
-        self.rca_capa_collection.create_index('timestamp')
-        self.rca_capa_collection.create_index('vehicle_id')
-        self.rca_capa_collection.create_index('oem_owner')
-        self.llm_responses_collection.create_index('timestamp')
-        self.llm_responses_collection.create_index('vehicle_id')
-        self.llm_responses_collection.create_index('agent_type')
+        self.db = client.get_database('vehicle_analysis', codec_options=CODEC_OPTIONS)
+        # Streamed anomalies are high-rate and re-derivable, so a primary ack without
+        # journal wait is enough; RCA/CAPA and LLM responses keep majority durability
+        self.anomalies_collection = self.db.get_collection('anomalies', write_concern=WriteConcern(w=1, j=False))
+        self.rca_capa_collection = self.db.get_collection('rca_capa', write_concern=WriteConcern(w='majority'))
+        self.llm_responses_collection = self.db.get_collection('llm_responses', write_concern=WriteConcern(w='majority'))
+        
+        self._create_indexes()
+        
+        self._last_ping_ok = True
+        self._last_ping_ts = time.monotonic()
+        self.client = client
+        
+        # Start background batch writer
+        if self._flusher is None:
+            self._flusher = threading.Thread(target=self._flush_loop, daemon=True)
+            self._flusher.start()
+        
+        # Start change-stream mirror of recent anomalies
+        if self._watcher is None:
+            self._watcher = threading.Thread(target=self._watch_loop, daemon=True)
+            self._watcher.start()
+    
+    def _create_indexes(self, names: Optional[List[str]] = None):
+        """
+        Create indexes matching the (filter, sort) shape of the read queries
+        
+        Reads filter on vehicle_id / oem_owner / agent_type and sort by newest
+        timestamp, so compound indexes let MongoDB walk the index in order and
+        stop at the limit instead of sorting the matches in memory.
+        
+        Args:
+            names: Collections to index (default: all)
+        """
+        for name in names or INDEXES:
+            for keys in INDEXES[name]:
+                try:
+                    self.db[name].create_index(keys)
+                    self._ready_indexes.add((name, tuple(keys)))
+                except OperationFailure as e:
+                    logger.warning("Could not create index %s on %s: %s", keys, name, e)
+    
+    def _truncate(self, name: str) -> int:
+        """
+        Empty a collection with drop() and recreate its indexes
+        
+        drop() is a constant-time metadata operation, unlike delete_many({})
+        which removes and oplogs every document one by one.
+        
+        Returns:
+            Number of documents removed (from collection metadata)
+        """
+        self.flush()  # include queued documents
+        collection = self.db[name]
+        removed = collection.estimated_document_count()
+        collection.drop()
+        self._ready_indexes = {entry for entry in self._ready_indexes if entry[0] != name}
+        self._create_indexes([name])
+        self._read_cache.invalidate(name)
+        return removed
+    
+    def _delete_chunked(self, name: str, query: Dict, chunk_size: Optional[int]) -> int:
+        """
+        Delete matching documents in _id chunks via unordered bulk_write
+        
+        Each chunk is a short server-side operation, so a large filtered clear
+        does not hold one long delete while reads wait behind it.
+        
+        Returns:
+            Number of deleted documents
+        """
+        collection = getattr(self, f'{name}_collection')
+        if not chunk_size:
+            deleted = collection.delete_many(query).deleted_count
+        else:
+            deleted = 0
+            chunk = []
+            for document in collection.find(query, {'_id': 1}).batch_size(chunk_size):
+                chunk.append(ObjectId(document['_id']))
+                if len(chunk) >= chunk_size:
+                    deleted += collection.bulk_write([DeleteMany({'_id': {'$in': chunk}})], ordered=False).deleted_count
+                    chunk = []
+            if chunk:
+                deleted += collection.bulk_write([DeleteMany({'_id': {'$in': chunk}})], ordered=False).deleted_count
+        self._read_cache.invalidate(name)
+        return deleted
+    
+    def _hint_for(self, collection: str, query: Dict) -> Optional[List]:
+        """
+        Index to hint for a filter + newest-first query, skipping the planner
+        
+        Only returned when the filter fields are exactly the index prefix before
+        timestamp and the index was created successfully.
+        """
+        for keys in INDEXES[collection]:
+            prefix = [field for field, _ in keys[:-1]]
+            if keys[-1][0] == 'timestamp' and set(prefix) == set(query) and len(prefix) == len(query):
+                if (collection, tuple(keys)) in self._ready_indexes:
+                    return keys
+        return None
+    
+    def _find_newest(self, collection: str, query: Dict, limit: int, fields: Optional[List[str]] = None) -> List[Dict]:
+        """Newest-first find with optional projection and index hint"""
+        projection = {field: 1 for field in fields} if fields else None
+        cursor = self.db[collection].find(query, projection).sort('timestamp', -1).limit(limit)
+        hint = self._hint_for(collection, query)
+        if hint:
+            cursor = cursor.hint(hint)
+        return list(cursor)
+    
+    # ========================================================================
+    # Batched writes
+    # ========================================================================
+    
+    @staticmethod
+    def _prepare(document: Dict) -> Dict:
+        """Copy of a document with a BSON timestamp and a client-side _id; the caller's dict is untouched"""
+        document = dict(document)
+        if 'timestamp' in document:
+            document['timestamp'] = _as_bson_date(document['timestamp'])
+        else:
+            document['timestamp'] = datetime.now(UTC)
+        document.setdefault('_id', ObjectId())
+        return document
+    
+    def _enqueue(self, collection: str, document: Dict) -> str:
+        """Queue a document for insert_many and return its client-side ObjectId"""
+        document = self._prepare(document)
+        self._write_queues[collection].append(document)
+        return str(document['_id'])
+    
+    def _insert_now(self, collection: str, document: Dict) -> str:
+        """Insert a document synchronously, ahead of the queue, and return its ObjectId"""
+        document = self._prepare(document)
+        getattr(self, f'{collection}_collection').insert_one(document)
+        self._read_cache.invalidate(collection)
+        return str(document['_id'])
+    
+    def _flush_loop(self):
+        """
+        Flusher thread: write queued documents every WRITE_FLUSH_INTERVAL_SEC
+        
+        It also keeps the cached connection state fresh, so save_* can enqueue
+        without ever blocking on a ping.
+        """
+        while not self._flusher_stop.wait(WRITE_FLUSH_INTERVAL_SEC):
+            self.is_connected()
+            self.flush()
+    
+    def flush(self, force: bool = False) -> int:
+        """
+        Write all queued documents now
+        
+        A batch that fails is put back at the front of its queue and retried
+        with exponential backoff, up to WRITE_MAX_RETRIES attempts. Documents
+        carry their _id from _enqueue, so a retry of a partly written batch
+        only adds duplicate-key errors, which count as written.
+        
+        Args:
+            force: Ignore the backoff delay (used by close())
+        
+        Returns:
+            Number of documents written
+        """
+        written = 0
+        with self._flush_lock:
+            for name, queue in self._write_queues.items():
+                if not force and time.monotonic() < self._write_retry_at[name]:
+                    continue
+                while queue:
+                    batch = []
+                    while queue and len(batch) < WRITE_BATCH_SIZE:
+                        batch.append(queue.popleft())
+                    try:
+                        collection = getattr(self, f'{name}_collection')
+                        result = collection.insert_many(batch, ordered=False)
+                        written += len(result.inserted_ids)
+                    except BulkWriteError as e:
+                        errors = e.details.get('writeErrors', [])
+                        if errors and all(err.get('code') == DUPLICATE_KEY_ERROR for err in errors):
+                            # Every document is in the collection already
+                            written += e.details.get('nInserted', 0)
+                        elif not self._requeue(name, batch, e):
+                            break
+                    except Exception as e:
+                        if not self._requeue(name, batch, e):
+                            break
+                    self._write_retries[name] = 0
+                    self._write_retry_at[name] = 0.0
+                    self._read_cache.invalidate(name)
+        return written
+    
+    def _requeue(self, name: str, batch: List[Dict], error: Exception) -> bool:
+        """
+        Put a failed batch back at the front of its queue, or drop it once it
+        has used up WRITE_MAX_RETRIES attempts
+        
+        Returns:
+            True when the batch was dropped and flushing can go on with the next one
+        """
+        self._force_recheck()
+        self._write_retries[name] += 1
+        attempts = self._write_retries[name]
+        if attempts >= WRITE_MAX_RETRIES:
+            logger.error("Dropping %d queued %s documents after %d failed attempts: %s",
+                         len(batch), name, attempts, error)
+            self.dropped_writes += len(batch)
+            return True
+        self._write_queues[name].extendleft(reversed(batch))
+        delay = WRITE_RETRY_BACKOFF_SEC * 2 ** (attempts - 1)
+        self._write_retry_at[name] = time.monotonic() + delay
+        logger.warning("Error writing %d queued %s documents (attempt %d/%d, retrying in %.1fs): %s",
+                       len(batch), name, attempts, WRITE_MAX_RETRIES, delay, error)
+        return False
+    
+    # ========================================================================
+    # Change-stream mirror of recent anomalies
+    # ========================================================================
+    
+    def _watch_loop(self):
+        """
+        Watcher thread: keep self._recent in sync with the anomalies collection
+        
+        The stream is opened before seeding so no insert is missed in between;
+        seeded documents are skipped when their insert event arrives. Change
+        streams need a replica set - on a standalone server the mirror stays
+        off and reads go to Mongo as before.
+        """
+        while not self._mirror_stop.is_set():
+            try:
+                with self.anomalies_collection.watch(max_await_time_ms=500) as stream:
+                    self._seed_mirror()
+                    while stream.alive and self._mirror_live and not self._mirror_stop.is_set():
+                        change = stream.try_next()
+                        if change is not None:
+                            self._apply_change(change)
+                # Stream closed or the mirror went stale (drop, update, ...) - reseed
+                continue
+            except (OperationFailure, NotImplementedError) as e:
+                if isinstance(e, NotImplementedError) or e.code in (40573, 40324):
+                    logger.info("Change streams unavailable, recent anomalies served from queries: %s", e)
+                    break
+                logger.warning("Change stream error: %s", e)
+            except Exception as e:
+                logger.warning("Change stream error: %s", e)
+            self._mirror_live = False
+            self._mirror_stop.wait(MIRROR_RETRY_SEC)
+        self._mirror_live = False
+    
+    def _seed_mirror(self):
+        """Load the newest RECENT_MIRROR_SIZE anomalies and the total count"""
+        docs = list(self.anomalies_collection.find({}).sort('timestamp', -1).limit(RECENT_MIRROR_SIZE))
+        total = self.anomalies_collection.count_documents({})
+        with self._mirror_lock:
+            self._recent = deque(docs)
+            self._recent_ids = {doc['_id'] for doc in docs}
+            self._recent_total = total
+            self._recent_version += 1
+            self._mirror_live = True
+    
+    def _apply_change(self, change: Dict):
+        """Apply one change-stream event to the mirror"""
+        op = change.get('operationType')
+        with self._mirror_lock:
+            if op == 'insert':
+                doc = change['fullDocument']
+                if doc['_id'] in self._recent_ids:
+                    return
+                # Keep the mirror in the same timestamp-desc order the Mongo
+                # fallback uses; inserts are almost always the newest document
+                ts = _sort_timestamp(doc)
+                pos = 0
+                for pos, held in enumerate(self._recent):
+                    if _sort_timestamp(held) <= ts:
+                        break
+                else:
+                    pos = len(self._recent)
+                self._recent_total += 1
+                if pos == len(self._recent) and len(self._recent) < self._recent_total - 1:
+                    return  # older than documents the mirror no longer holds
+                self._recent.insert(pos, doc)
+                self._recent_ids.add(doc['_id'])
+                if len(self._recent) > RECENT_MIRROR_SIZE:
+                    self._recent_ids.discard(self._recent.pop()['_id'])
+            elif op == 'delete':
+                doc_id = change['documentKey']['_id']
+                self._recent_total = max(self._recent_total - 1, 0)
+                if doc_id in self._recent_ids:
+                    self._recent_ids.discard(doc_id)
+                    self._recent = deque(d for d in self._recent if d['_id'] != doc_id)
+            else:
+                # drop/invalidate/update/...: stop serving until the watcher reseeds
+                self._mirror_live = False
+            self._recent_version += 1
+    
+    def _mirror_page(self, limit: int, fields: Optional[List[str]] = None, as_json: bool = False) -> Optional[Dict]:
+        """
+        Serve the newest `limit` anomalies from the mirror
+        
+        Items are ordered by timestamp desc like the Mongo query and are deep
+        copies taken under the mirror lock, so callers may mutate them.
+        
+        Args:
+            limit: Maximum number of anomalies to return
+            fields: Optional list of fields to return (default: all fields)
+            as_json: Return 'items' as JSON-encoded bytes, serialized under the
+                lock instead of copied
+        
+        Returns:
+            {'items': [...], 'total': int}, or None when the mirror cannot answer
+            (not live, too few documents held, or dotted projection fields)
+        """
+        if not self._mirror_live or (fields and any('.' in field for field in fields)):
+            return None
+        with self._mirror_lock:
+            if not self._mirror_live:
+                return None
+            if limit > len(self._recent) and len(self._recent) < self._recent_total:
+                return None
+            items = list(islice(self._recent, limit))
+            if fields:
+                keys = ('_id', *fields)
+                items = [{k: doc[k] for k in keys if k in doc} for doc in items]
+            if as_json:
+                return {'items': orjson.dumps(items, default=str), 'total': self._recent_total, 'count': len(items)}
+            return {'items': deepcopy(items), 'total': self._recent_total}
     
     def is_connected(self) -> bool:
-        """Check if MongoDB is connected"""
+        """
+        Check if MongoDB is connected
+        
+        The ping result is cached for PING_INTERVAL_SEC, so handler methods do
+        not pay an extra round-trip each. A failed operation forces a re-check.
+        """
+        if not self.client:
+            return False
+        
+        now = time.monotonic()
+        if now - self._last_ping_ts < self._ping_interval:
+            return self._last_ping_ok
+        
         try:
-            if self.client:
-                self.client.admin.command('ping')
-                return True
-        except:
-            pass
-        return False
+            self.client.admin.command('ping')
+            self._last_ping_ok = True
+        except Exception:
+            self._last_ping_ok = False
+        self._last_ping_ts = now
+        return self._last_ping_ok
+    
+    def _warn_not_connected(self, action: str):
+        """Log a not-connected warning, at most once per NOT_CONNECTED_WARN_INTERVAL_SEC"""
+        now = time.monotonic()
+        if now - self._last_not_connected_warning >= NOT_CONNECTED_WARN_INTERVAL_SEC:
+            self._last_not_connected_warning = now
+            logger.warning("Not connected - cannot %s", action)
     
-    def save_anomaly(self, anomaly_data: Dict) -> Optional[str]:
+    def _force_recheck(self):
+        """Make the next is_connected() call ping again after an operation failed"""
+        self._last_ping_ts = 0.0
+    
+    def save_anomaly(self, anomaly_data: Dict, sync: bool = False) -> Optional[str]:
         """
         Save anomaly data to MongoDB
         
         Args:
             anomaly_data: Dictionary containing anomaly details
+            sync: Insert before returning instead of queueing, for callers
+                that report the write to a client
         
         Returns:
             Document ID if successful, None otherwise
         """
-        if not self.is_connected():
-            print("[MONGODB] Not connected")
+        if not self._last_ping_ok:  # cached state only; the flusher thread refreshes it
+            self._warn_not_connected("save anomaly")
             return None
         
         try:
-            # Add timestamp if not present
-            if 'timestamp' not in anomaly_data:
-                anomaly_data['timestamp'] = datetime.now(UTC).isoformat()
-            
-            # Insert into MongoDB
-            result = self.anomalies_collection.insert_one(anomaly_data)
-            return str(result.inserted_id)
+            if sync:
+                return self._insert_now('anomalies', anomaly_data)
+            # Queued for the batch writer; the ID is assigned client-side
+            return self._enqueue('anomalies', anomaly_data)
         except Exception as e:
-            print(f"[MONGODB] Error saving anomaly: {e}")
+            logger.error("Error saving anomaly: %s", e)
+            self._force_recheck()
             return None
     
-    def get_all_anomalies(self, limit: int = 100, vehicle_id: Optional[str] = None) -> List[Dict]:
+    def get_all_anomalies(self, limit: int = 100, vehicle_id: Optional[str] = None, fields: Optional[List[str]] = None) -> List[Dict]:
         """
-        Get all anomalies from MongoDB
+        Get all anomalies from MongoDB (unfiltered reads use the change-stream mirror when live)
         
         Args:
             limit: Maximum number of anomalies to return
             vehicle_id: Optional filter by vehicle ID
+            fields: Optional list of fields to return (default: all fields)
         
         Returns:
             List of anomaly documents
         """
+        if vehicle_id is None:
+            page = self._mirror_page(limit, fields)
+            if page is not None:
+                return page['items']
+        
+        cache_key = ('anomalies', 'list', vehicle_id, limit, tuple(fields or ()))
+        cached = self._read_cache.get(cache_key)
+        if cached is not None:
+            return cached
+        
         if not self.is_connected():
-            print("[MONGODB] Not connected")
+            self._warn_not_connected("fetch anomalies")
             return []
         
         try:
@@ -119,48 +660,87 @@ class MongoDBHandler:
                 query['vehicle_id'] = vehicle_id
             
             # Get anomalies sorted by timestamp (newest first)
-            # No projection = return ALL fields
-            anomalies = list(
-                self.anomalies_collection
-                .find(query)
-                .sort('timestamp', -1)
-                .limit(limit)
-            )
-            
-            # Convert ObjectId to string
-            for anomaly in anomalies:
-                anomaly['_id'] = str(anomaly['_id'])
+            anomalies = self._find_newest('anomalies', query, limit, fields)
             
+            self._read_cache.put(cache_key, anomalies)
             return anomalies
         except Exception as e:
-            print(f"[MONGODB] Error fetching anomalies: {e}")
+            logger.error("Error fetching anomalies: %s", e)
+            self._force_recheck()
             return []
         except Exception as e:
-            print(f"[MONGODB] Error fetching anomalies: {e}")
+            logger.error("Error fetching anomalies: %s", e)
             return []
     
-    def get_anomaly_by_id(self, anomaly_id: str) -> Optional[Dict]:
+    def get_anomalies_summary(self, limit: int = 500, preview_chars: int = 200) -> List[Dict]:
+        """
+        Get lightweight anomaly summaries sorted by packet index
+        
+        Only the summary fields are projected and the response preview is
+        truncated server-side, so full analyses never leave the database.
+        
+        Args:
+            limit: Maximum number of summaries to return
+            preview_chars: Length of the analysis response preview
+        
+        Returns:
+            List of summary documents (packet_index, timestamp, agent, response_preview)
+        """
+        cache_key = ('anomalies', 'summary', limit, preview_chars)
+        cached = self._read_cache.get(cache_key)
+        if cached is not None:
+            return cached
+        
+        if not self.is_connected():
+            return []
+        
+        try:
+            projection = {
+                '_id': 0,
+                'packet_index': 1,
+                'timestamp': 1,
+                'agent': '$analysis.agent',
+                'response_preview': {
+                    '$substrCP': [{'$ifNull': ['$analysis.response', 'N/A']}, 0, preview_chars]
+                }
+            }
+            summaries = list(self.anomalies_collection.aggregate([
+                {'$sort': {'packet_index': 1}},
+                {'$limit': limit},
+                {'$project': projection}
+            ]))
+            self._read_cache.put(cache_key, summaries)
+            return summaries
+        except Exception as e:
+            logger.error("Error fetching anomaly summaries: %s", e)
+            self._force_recheck()
+            return []
+    
+    def get_anomaly_by_id(self, anomaly_id: str, fields: Optional[List[str]] = None) -> Optional[Dict]:
         """
         Get a specific anomaly by ID
         
         Args:
             anomaly_id: MongoDB document ID
+            fields: Optional list of fields to return (default: all fields)
         
         Returns:
             Anomaly document or None
         """
+        # Malformed IDs can never match - skip the round-trip
+        if not isinstance(anomaly_id, str) or not _OBJECT_ID_RE.match(anomaly_id):
+            return None
+        
         if not self.is_connected():
             return None
         
         try:
-            from bson.objectid import ObjectId
-            
-            anomaly = self.anomalies_collection.find_one({'_id': ObjectId(anomaly_id)})
-            if anomaly:
-                anomaly['_id'] = str(anomaly['_id'])
-            return anomaly
+            self.flush()  # include queued documents
+            projection = {field: 1 for field in fields} if fields else None
+            return self.anomalies_collection.find_one({'_id': ObjectId(anomaly_id)}, projection)
         except Exception as e:
-            print(f"[MONGODB] Error fetching anomaly: {e}")
+            logger.error("Error fetching anomaly: %s", e)
+            self._force_recheck()
             return None
     
     def get_anomalies_count(self, vehicle_id: Optional[str] = None) -> int:
@@ -173,6 +753,14 @@ class MongoDBHandler:
         Returns:
             Count of anomalies
         """
+        if vehicle_id is None and self._mirror_live:
+            return self._recent_total
+        
+        cache_key = ('anomalies', 'count', vehicle_id)
+        cached = self._read_cache.get(cache_key)
+        if cached is not None:
+            return cached
+        
         if not self.is_connected():
             return 0
         
@@ -181,9 +769,12 @@ class MongoDBHandler:
             if vehicle_id:
                 query['vehicle_id'] = vehicle_id
             
-            return self.anomalies_collection.count_documents(query)
+            count = self.anomalies_collection.count_documents(query)
+            self._read_cache.put(cache_key, count)
+            return count
         except Exception as e:
-            print(f"[MONGODB] Error counting anomalies: {e}")
+            logger.error("Error counting anomalies: %s", e)
+            self._force_recheck()
             return 0
     
     def delete_anomaly(self, anomaly_id: str) -> bool:
@@ -196,24 +787,29 @@ class MongoDBHandler:
         Returns:
             True if deletion was successful, False otherwise
         """
+        if not isinstance(anomaly_id, str) or not _OBJECT_ID_RE.match(anomaly_id):
+            return False
+        
         if not self.is_connected():
             return False
         
         try:
-            from bson.objectid import ObjectId
-            
+            self.flush()  # include queued documents
             result = self.anomalies_collection.delete_one({'_id': ObjectId(anomaly_id)})
+            self._read_cache.invalidate('anomalies')
             return result.deleted_count > 0
         except Exception as e:
-            print(f"[MONGODB] Error deleting anomaly: {e}")
+            logger.error("Error deleting anomaly: %s", e)
+            self._force_recheck()
             return False
     
-    def clear_all_anomalies(self, vehicle_id: Optional[str] = None) -> int:
+    def clear_all_anomalies(self, vehicle_id: Optional[str] = None, chunk_size: Optional[int] = DELETE_CHUNK_SIZE) -> int:
         """
         Clear all anomalies (or for a specific vehicle)
         
         Args:
             vehicle_id: Optional filter by vehicle ID
+            chunk_size: Delete filtered matches in chunks of this many documents (None = single delete_many)
         
         Returns:
             Number of deleted documents
@@ -222,44 +818,48 @@ class MongoDBHandler:
             return 0
         
         try:
+            self.flush()  # include queued documents
             query = {}
             if vehicle_id:
                 query['vehicle_id'] = vehicle_id
             
-            result = self.anomalies_collection.delete_many(query)
-            return result.deleted_count
+            if not query:
+                return self._truncate('anomalies')
+            
+            return self._delete_chunked('anomalies', query, chunk_size)
         except Exception as e:
-            print(f"[MONGODB] Error clearing anomalies: {e}")
+            logger.error("Error clearing anomalies: %s", e)
+            self._force_recheck()
             return 0
     
-    def save_rca_capa(self, rca_capa_data: Dict) -> Optional[str]:
+    def save_rca_capa(self, rca_capa_data: Dict, sync: bool = False) -> Optional[str]:
         """
         Save RCA/CAPA analysis to MongoDB
         
         Args:
             rca_capa_data: Dictionary containing RCA/CAPA analysis
                 Expected keys: vehicle_id, parsed_rca_capa, raw_response, oem_owners, etc.
+            sync: Insert before returning instead of queueing, for callers
+                that report the write to a client
         
         Returns:
             Document ID if successful, None otherwise
         """
-        if not self.is_connected():
-            print("[MONGODB] Not connected - cannot save RCA/CAPA")
+        if not self._last_ping_ok:  # cached state only; the flusher thread refreshes it
+            self._warn_not_connected("save RCA/CAPA")
             return None
         
         try:
-            # Add timestamp if not present
-            if 'timestamp' not in rca_capa_data:
-                rca_capa_data['timestamp'] = datetime.now(UTC).isoformat()
-            
-            # Insert into MongoDB
-            result = self.rca_capa_collection.insert_one(rca_capa_data)
-            return str(result.inserted_id)
+            if sync:
+                return self._insert_now('rca_capa', rca_capa_data)
+            # Queued for the batch writer; the ID is assigned client-side
+            return self._enqueue('rca_capa', rca_capa_data)
         except Exception as e:
-            print(f"[MONGODB] Error saving RCA/CAPA: {e}")
+            logger.error("Error saving RCA/CAPA: %s", e)
+            self._force_recheck()
             return None
     
-    def get_rca_capa_analyses(self, vehicle_id: Optional[str] = None, limit: int = 100, oem_owner: Optional[str] = None) -> List[Dict]:
+    def get_rca_capa_analyses(self, vehicle_id: Optional[str] = None, limit: int = 100, oem_owner: Optional[str] = None, fields: Optional[List[str]] = None) -> List[Dict]:
         """
         Retrieve RCA/CAPA analyses from MongoDB
         
@@ -267,10 +867,16 @@ class MongoDBHandler:
             vehicle_id: Optional filter by vehicle ID
             limit: Maximum number of documents to return
             oem_owner: Optional filter by OEM team owner
+            fields: Optional list of fields to return (default: all fields)
         
         Returns:
             List of RCA/CAPA documents
         """
+        cache_key = ('rca_capa', 'list', vehicle_id, limit, oem_owner, tuple(fields or ()))
+        cached = self._read_cache.get(cache_key)
+        if cached is not None:
+            return cached
+        
         if not self.is_connected():
             return []
         
@@ -281,50 +887,43 @@ class MongoDBHandler:
             if oem_owner:
                 query['oem_owner'] = oem_owner
             
-            analyses = list(
-                self.rca_capa_collection
-                .find(query)
-                .sort('timestamp', -1)
-                .limit(limit)
-            )
-            
-            # Convert ObjectId to string
-            for analysis in analyses:
-                analysis['_id'] = str(analysis['_id'])
+            analyses = self._find_newest('rca_capa', query, limit, fields)
             
+            self._read_cache.put(cache_key, analyses)
             return analyses
         except Exception as e:
-            print(f"[MONGODB] Error fetching RCA/CAPA analyses: {e}")
+            logger.error("Error fetching RCA/CAPA analyses: %s", e)
+            self._force_recheck()
             return []
     
-    def save_llm_response(self, llm_response_data: Dict) -> Optional[str]:
+    def save_llm_response(self, llm_response_data: Dict, sync: bool = False) -> Optional[str]:
         """
         Save detailed LLM response (parsed format) to MongoDB
         
         Args:
             llm_response_data: Dictionary containing parsed LLM response
                 Expected keys: vehicle_id, agent_type, parsed_data, timestamp, etc.
+            sync: Insert before returning instead of queueing, for callers
+                that report the write to a client
         
         Returns:
             Document ID if successful, None otherwise
         """
-        if not self.is_connected():
-            print("[MONGODB] Not connected - cannot save LLM response")
+        if not self._last_ping_ok:  # cached state only; the flusher thread refreshes it
+            self._warn_not_connected("save LLM response")
             return None
         
         try:
-            # Add timestamp if not present
-            if 'timestamp' not in llm_response_data:
-                llm_response_data['timestamp'] = datetime.now(UTC).isoformat()
-            
-            # Insert into MongoDB
-            result = self.llm_responses_collection.insert_one(llm_response_data)
-            return str(result.inserted_id)
+            if sync:
+                return self._insert_now('llm_responses', llm_response_data)
+            # Queued for the batch writer; the ID is assigned client-side
+            return self._enqueue('llm_responses', llm_response_data)
         except Exception as e:
-            print(f"[MONGODB] Error saving LLM response: {e}")
+            logger.error("Error saving LLM response: %s", e)
+            self._force_recheck()
             return None
     
-    def get_llm_responses(self, vehicle_id: Optional[str] = None, agent_type: Optional[str] = None, limit: int = 100) -> List[Dict]:
+    def get_llm_responses(self, vehicle_id: Optional[str] = None, agent_type: Optional[str] = None, limit: int = 100, fields: Optional[List[str]] = None) -> List[Dict]:
         """
         Retrieve parsed LLM responses from MongoDB
         
@@ -332,10 +931,16 @@ class MongoDBHandler:
             vehicle_id: Optional filter by vehicle ID
             agent_type: Optional filter by agent type (diagnostic, maintenance, performance, rca_capa)
             limit: Maximum number of documents to return
+            fields: Optional list of fields to return (default: all fields)
         
         Returns:
             List of LLM response documents
         """
+        cache_key = ('llm_responses', 'list', vehicle_id, agent_type, limit, tuple(fields or ()))
+        cached = self._read_cache.get(cache_key)
+        if cached is not None:
+            return cached
+        
         if not self.is_connected():
             return []
         
@@ -346,20 +951,13 @@ class MongoDBHandler:
             if agent_type:
                 query['agent_type'] = agent_type
             
-            responses = list(
-                self.llm_responses_collection
-                .find(query)
-                .sort('timestamp', -1)
-                .limit(limit)
-            )
-            
-            # Convert ObjectId to string
-            for response in responses:
-                response['_id'] = str(response['_id'])
+            responses = self._find_newest('llm_responses', query, limit, fields)
             
+            self._read_cache.put(cache_key, responses)
             return responses
         except Exception as e:
-            print(f"[MONGODB] Error fetching LLM responses: {e}")
+            logger.error("Error fetching LLM responses: %s", e)
+            self._force_recheck()
             return []
     
     def get_rca_capa_count(self, vehicle_id: Optional[str] = None, oem_owner: Optional[str] = None) -> int:
@@ -373,6 +971,11 @@ class MongoDBHandler:
         Returns:
             Count of RCA/CAPA documents
         """
+        cache_key = ('rca_capa', 'count', vehicle_id, oem_owner)
+        cached = self._read_cache.get(cache_key)
+        if cached is not None:
+            return cached
+        
         if not self.is_connected():
             return 0
         
@@ -383,9 +986,12 @@ class MongoDBHandler:
             if oem_owner:
                 query['oem_owner'] = oem_owner
             
-            return self.rca_capa_collection.count_documents(query)
+            count = self.rca_capa_collection.count_documents(query)
+            self._read_cache.put(cache_key, count)
+            return count
         except Exception as e:
-            print(f"[MONGODB] Error counting RCA/CAPA: {e}")
+            logger.error("Error counting RCA/CAPA: %s", e)
+            self._force_recheck()
             return 0
     
     def get_llm_responses_count(self, vehicle_id: Optional[str] = None, agent_type: Optional[str] = None) -> int:
@@ -399,6 +1005,11 @@ class MongoDBHandler:
         Returns:
             Count of LLM response documents
         """
+        cache_key = ('llm_responses', 'count', vehicle_id, agent_type)
+        cached = self._read_cache.get(cache_key)
+        if cached is not None:
+            return cached
+        
         if not self.is_connected():
             return 0
         
@@ -409,17 +1020,160 @@ class MongoDBHandler:
             if agent_type:
                 query['agent_type'] = agent_type
             
-            return self.llm_responses_collection.count_documents(query)
+            count = self.llm_responses_collection.count_documents(query)
+            self._read_cache.put(cache_key, count)
+            return count
         except Exception as e:
-            print(f"[MONGODB] Error counting LLM responses: {e}")
+            logger.error("Error counting LLM responses: %s", e)
+            self._force_recheck()
             return 0
     
-    def clear_all_rca_capa(self, vehicle_id: Optional[str] = None) -> int:
+    # ========================================================================
+    # Combined list + count (one round-trip via $facet)
+    # ========================================================================
+    
+    def _fetch_page(self, collection: str, query: Dict, limit: int, fields: Optional[List[str]] = None, as_json: bool = False) -> Dict:
+        """
+        Fetch the newest `limit` documents matching query together with the total count
+        
+        With as_json=True, 'items' is the JSON-encoded list (bytes) and 'count'
+        its length. The encoding is cached with the page, so polling clients get
+        pre-serialized bytes the endpoint writes out without re-encoding documents.
+        
+        Returns:
+            {'items': [...], 'total': int} or {'items': bytes, 'total': int, 'count': int}
+        """
+        cache_key = (collection, 'page', tuple(sorted(query.items())), limit, tuple(fields or ()))
+        if not as_json:
+            return self._query_page(collection, query, limit, fields, cache_key)
+        
+        json_key = cache_key + ('json',)
+        cached = self._read_cache.get(json_key)
+        if cached is not None:
+            return cached
+        page = self._query_page(collection, query, limit, fields, cache_key)
+        encoded = {
+            'items': orjson.dumps(page['items'], default=str),
+            'total': page['total'],
+            'count': len(page['items'])
+        }
+        if page['items'] or page['total']:
+            self._read_cache.put(json_key, encoded)
+        return encoded
+    
+    def _query_page(self, collection: str, query: Dict, limit: int, fields: Optional[List[str]], cache_key: Tuple) -> Dict:
+        """Run (or reuse) the $facet aggregation behind _fetch_page"""
+        cached = self._read_cache.get(cache_key)
+        if cached is not None:
+            return cached
+        
+        if not self.is_connected():
+            return {'items': [], 'total': 0}
+        
+        try:
+            # $match + $sort sit ahead of $facet so they can walk the
+            # (filter, timestamp) index; $facet sub-pipelines never use indexes
+            items_pipeline = [{'$limit': limit}]
+            if fields:
+                items_pipeline.append({'$project': {field: 1 for field in fields}})
+            pipeline = [
+                {'$match': query},
+                {'$sort': {'timestamp': -1}},
+                {'$facet': {'items': items_pipeline, 'total': [{'$count': 'n'}]}}
+            ]
+            hint = self._hint_for(collection, query)
+            options = {'hint': hint} if hint else {}
+            result = list(self.db[collection].aggregate(pipeline, **options))
+            facet = result[0] if result else {'items': [], 'total': []}
+            page = {'items': facet['items'], 'total': facet['total'][0]['n'] if facet['total'] else 0}
+            self._read_cache.put(cache_key, page)
+            return page
+        except Exception as e:
+            logger.error("Error fetching %s page: %s", collection, e)
+            self._force_recheck()
+            return {'items': [], 'total': 0}
+    
+    def get_anomalies_page(self, vehicle_id: Optional[str] = None, limit: int = 100, fields: Optional[List[str]] = None, as_json: bool = False) -> Dict:
+        """
+        Get the newest anomalies and their total count in one query
+        
+        Unfiltered pages come from the change-stream mirror when it is live.
+        
+        Args:
+            vehicle_id: Optional filter by vehicle ID
+            limit: Maximum number of anomalies to return
+            fields: Optional list of fields to return (default: all fields)
+            as_json: Return 'items' as JSON-encoded bytes instead of dicts
+        
+        Returns:
+            {'items': anomaly documents, 'total': count of all matches}
+        """
+        if vehicle_id is None:
+            json_key = ('anomalies', 'mirror', self._recent_version, limit, tuple(fields or ()))
+            if as_json:
+                cached = self._read_cache.get(json_key)
+                if cached is not None:
+                    return cached
+            page = self._mirror_page(limit, fields, as_json)
+            if page is not None:
+                if as_json:
+                    self._read_cache.put(json_key, page)
+                return page
+        
+        query = {}
+        if vehicle_id:
+            query['vehicle_id'] = vehicle_id
+        return self._fetch_page('anomalies', query, limit, fields, as_json)
+    
+    def get_rca_capa_page(self, vehicle_id: Optional[str] = None, limit: int = 100, oem_owner: Optional[str] = None, fields: Optional[List[str]] = None, as_json: bool = False) -> Dict:
+        """
+        Get the newest RCA/CAPA analyses and their total count in one query
+        
+        Args:
+            vehicle_id: Optional filter by vehicle ID
+            limit: Maximum number of documents to return
+            oem_owner: Optional filter by OEM team owner
+            fields: Optional list of fields to return (default: all fields)
+            as_json: Return 'items' as JSON-encoded bytes instead of dicts
+        
+        Returns:
+            {'items': RCA/CAPA documents, 'total': count of all matches}
+        """
+        query = {}
+        if vehicle_id:
+            query['vehicle_id'] = vehicle_id
+        if oem_owner:
+            query['oem_owner'] = oem_owner
+        return self._fetch_page('rca_capa', query, limit, fields, as_json)
+    
+    def get_llm_responses_page(self, vehicle_id: Optional[str] = None, agent_type: Optional[str] = None, limit: int = 100, fields: Optional[List[str]] = None, as_json: bool = False) -> Dict:
+        """
+        Get the newest LLM responses and their total count in one query
+        
+        Args:
+            vehicle_id: Optional filter by vehicle ID
+            agent_type: Optional filter by agent type
+            limit: Maximum number of documents to return
+            fields: Optional list of fields to return (default: all fields)
+            as_json: Return 'items' as JSON-encoded bytes instead of dicts
+        
+        Returns:
+            {'items': LLM response documents, 'total': count of all matches}
+        """
+        query = {}
+        if vehicle_id:
+            query['vehicle_id'] = vehicle_id
+        if agent_type:
+            query['agent_type'] = agent_type
+        return self._fetch_page('llm_responses', query, limit, fields, as_json)
+    
+    def clear_all_rca_capa(self, vehicle_id: Optional[str] = None, chunk_size: Optional[int] = DELETE_CHUNK_SIZE) -> int:
         """
         Clear all RCA/CAPA analyses (or for a specific vehicle)
         
         Args:
             vehicle_id: Optional filter by vehicle ID
+            chunk_size: Delete filtered matches in chunks of this many documents (None = single delete_many)
         
         Returns:
             Number of deleted documents
@@ -428,23 +1182,28 @@ class MongoDBHandler:
             return 0
         
         try:
+            self.flush()  # include queued documents
             query = {}
             if vehicle_id:
                 query['vehicle_id'] = vehicle_id
             
-            result = self.rca_capa_collection.delete_many(query)
-            return result.deleted_count
+            if not query:
+                return self._truncate('rca_capa')
+            
+            return self._delete_chunked('rca_capa', query, chunk_size)
         except Exception as e:
-            print(f"[MONGODB] Error clearing RCA/CAPA: {e}")
+            logger.error("Error clearing RCA/CAPA: %s", e)
+            self._force_recheck()
             return 0
     
-    def clear_all_llm_responses(self, vehicle_id: Optional[str] = None, agent_type: Optional[str] = None) -> int:
+    def clear_all_llm_responses(self, vehicle_id: Optional[str] = None, agent_type: Optional[str] = None, chunk_size: Optional[int] = DELETE_CHUNK_SIZE) -> int:
         """
         Clear all LLM responses (or for a specific vehicle/agent)
         
         Args:
             vehicle_id: Optional filter by vehicle ID
             agent_type: Optional filter by agent type
+            chunk_size: Delete filtered matches in chunks of this many documents (None = single delete_many)
         
         Returns:
             Number of deleted documents
@@ -453,20 +1212,73 @@ class MongoDBHandler:
             return 0
         
         try:
+            self.flush()  # include queued documents
             query = {}
             if vehicle_id:
                 query['vehicle_id'] = vehicle_id
             if agent_type:
                 query['agent_type'] = agent_type
             
-            result = self.llm_responses_collection.delete_many(query)
-            return result.deleted_count
+            if not query:
+                return self._truncate('llm_responses')
+            
+            return self._delete_chunked('llm_responses', query, chunk_size)
         except Exception as e:
-            print(f"[MONGODB] Error clearing LLM responses: {e}")
+            logger.error("Error clearing LLM responses: %s", e)
+            self._force_recheck()
             return 0
     
     def close(self):
-        """Close MongoDB connection"""
+        """Flush queued writes and close MongoDB connection"""
+        self._flusher_stop.set()
+        self._mirror_stop.set()
+        if self._flusher is not None:
+            self._flusher.join(timeout=5)
+            self._flusher = None
+        if self._watcher is not None:
+            self._watcher.join(timeout=5)
+            self._watcher = None
         if self.client:
+            # Retry failed batches without waiting out the full backoff,
+            # then report whatever still could not be written
+            for _ in range(WRITE_MAX_RETRIES):
+                self.flush(force=True)
+                if not any(self._write_queues.values()):
+                    break
+                time.sleep(WRITE_RETRY_BACKOFF_SEC)
+            for name, queue in self._write_queues.items():
+                if queue:
+                    logger.error("Closing with %d unwritten %s documents", len(queue), name)
             self.client.close()
-            print("[MONGODB] Connection closed")
+            logger.info("Connection closed")
+        
+        # A later get_handler() call should build a fresh client
+        global _handler
+        if _handler is self:
+            _handler = None
+
+
+# ============================================================================
+# Process-wide handler
+# ============================================================================
+
+_handler: Optional[MongoDBHandler] = None
+_singleton_lock = threading.Lock()
+
+
+def get_handler(connect: bool = True) -> MongoDBHandler:
+    """
+    Return the process-wide MongoDBHandler, creating it on first use
+    
+    PyMongo's connection pool is thread-safe, so the API, the stream worker
+    and the batch writer all share one client instead of opening their own.
+    
+    Args:
+        connect: Passed to MongoDBHandler when it is created
+    """
+    global _handler
+    if _handler is None:
+        with _singleton_lock:
+            if _handler is None:
+                _handler = MongoDBHandler(connect=connect)
+    return _handler
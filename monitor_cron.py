@@ -11,18 +11,76 @@ Or for testing every 5 minutes:
     */5 * * * * /usr/bin/python3 /path/to/monitor_cron.py >> /path/to/cron.log 2>&1
 """
 import asyncio
-import json
+import atexit
+import hashlib
+import time
+from array import array
+from collections import OrderedDict, deque
 from datetime import datetime
 from pathlib import Path
+import orjson
 import os
 import sys
 
 # Add parent directory to path for imports
 sys.path.insert(0, str(Path(__file__).parent))
 
-from agents_final import get_comprehensive_analysis
+from agents_final import get_comprehensive_analysis, close_llm_http_client
 from utils import VehicleDataManager, AnalysisLogger, get_sensor_status
 
+# Max vehicles analyzed at once (each analysis is a set of LLM round-trips)
+MONITOR_CONCURRENCY = int(os.getenv("MONITOR_CONCURRENCY", "8"))
+
+# Logs are append-only NDJSON; they are trimmed back to these sizes by rotation.
+# Each log has a .bcl sidecar holding the byte offset of every line, so line
+# counts and "last N" reads never scan the file.
+MAX_MONITORING_LOGS = 500
+MAX_ALERTS = 100
+ROTATE_SLACK = 50  # lines allowed past the cap before a mid-run compaction
+# The same vehicle + issue set is alerted at most once per this window
+ALERT_DEDUP_TTL_SEC = int(os.getenv("ALERT_DEDUP_TTL_SEC", "600"))
+# A vehicle with unchanged sensors and no critical issues reuses its last analysis for this long
+ANALYSIS_CACHE_MINUTES = int(os.getenv("ANALYSIS_CACHE_MINUTES", "60"))
+
+# Critical sensor thresholds: sensor -> (low, high, message); critical when value < low or value > high
+INF = float("inf")
+CRITICAL_CHECKS = {
+    "engine_temp_c": (-INF, 110, "Engine temperature critically high"),
+    "battery_voltage": (12.0, 15.0, "Battery voltage critically low"),
+    "oil_pressure_kpa": (150, INF, "Oil pressure critically low"),
+    "coolant_temp_c": (-INF, 105, "Coolant temperature critically high"),
+    "fuel_level_percent": (10, INF, "Fuel level critically low"),
+    "brake_fluid_level_percent": (50, INF, "Brake fluid critically low"),
+    "battery_soc": (10, INF, "Battery charge critically low"),
+}
+
+
+class RunScopedDataManager(VehicleDataManager):
+    """
+    VehicleDataManager view that memoizes get_vehicle_data for one monitoring pass.
+    
+    The sensor check and every agent tool call re-fetch (and re-flatten) the
+    same vehicle record; within one pass the data cannot change, so each
+    vehicle is built once and kept as orjson bytes. Every call decodes a fresh
+    copy, so a caller mutating its result cannot affect later calls. The
+    wrapped manager is never patched; drop this object when the pass ends.
+    """
+    
+    def __init__(self, source: VehicleDataManager):
+        self.db_path = source.db_path
+        self.data = source.data
+        self._is_new_format = source._is_new_format
+        self._source = source
+        self._encoded = {}  # vehicle_id -> orjson bytes (b"null" when not found)
+    
+    def get_vehicle_data(self, vehicle_id, snapshot_index=None):
+        if snapshot_index is not None:
+            return self._source.get_vehicle_data(vehicle_id, snapshot_index)
+        encoded = self._encoded.get(vehicle_id)
+        if encoded is None:
+            encoded = self._encoded[vehicle_id] = orjson.dumps(self._source.get_vehicle_data(vehicle_id))
+        return orjson.loads(encoded)
+
 
 class MonitoringService:
     """Service for scheduled vehicle monitoring"""
@@ -30,49 +88,220 @@ class MonitoringService:
     def __init__(self):
         self.data_manager = VehicleDataManager()
         self.logger = AnalysisLogger()
-        self.monitoring_log_path = Path("dataset/monitoring_reports.json")
-        self.alerts_path = Path("dataset/alerts.json")
+        self.monitoring_log_path = Path("dataset/monitoring_reports.ndjson")
+        self.alerts_path = Path("dataset/alerts.ndjson")
+        self._offsets = {}  # path -> array('Q') of line start offsets + file size sentinel
+        self._append_files = {}  # path -> open 'ab' handle with a 1 MB buffer
+        self._recent_alerts = None  # OrderedDict alert key -> epoch seconds, loaded on first alert
+        self._recent_reports = None  # deque of the last MAX_MONITORING_LOGS reports, loaded on first read
+        self._last_reports = None  # vehicle_id -> latest report, seeded from the log on first use
+        
+        # Buffered appends still reach disk if the process exits without run()
+        atexit.register(self._sync_appends)
     
-    def load_monitoring_logs(self) -> list:
-        """Load existing monitoring logs"""
-        if self.monitoring_log_path.exists():
+    async def aclose(self):
+        """Sync pending log writes and close the shared keep-alive LLM HTTP client"""
+        self._sync_appends()
+        await close_llm_http_client()
+    
+    async def run(self):
+        """One monitoring pass; every vehicle's LLM calls share one pooled HTTP client"""
+        try:
+            await self.monitor_all_vehicles()
+        finally:
+            await self.aclose()
+    
+    def load_monitoring_logs(self):
+        """Yield existing monitoring logs, oldest first (one JSON object per line)"""
+        if not self.monitoring_log_path.exists():
+            return
+        pending = self._append_files.get(self.monitoring_log_path)
+        if pending is not None:
+            pending.flush()
+        with open(self.monitoring_log_path, 'rb') as f:
+            for line in f:
+                try:
+                    yield orjson.loads(line)
+                except orjson.JSONDecodeError:
+                    continue  # torn or corrupt line
+    
+    def get_last_monitoring_logs(self, n: int = MAX_MONITORING_LOGS) -> list:
+        """Return the last n monitoring logs, oldest first"""
+        if n > MAX_MONITORING_LOGS:
+            return self._read_last(self.monitoring_log_path, n)
+        if self._recent_reports is None:
+            # Parsed from disk once; save_monitoring_log keeps it current
+            self._recent_reports = deque(self._read_last(self.monitoring_log_path, MAX_MONITORING_LOGS), maxlen=MAX_MONITORING_LOGS)
+        if n <= 0:
+            return []
+        return list(self._recent_reports)[-n:]
+    
+    def _read_last(self, path: Path, n: int) -> list:
+        """Seek straight to the last n lines of an NDJSON log via its offset index"""
+        pending = self._append_files.get(path)
+        if pending is not None:
+            pending.flush()
+        offsets = self._line_offsets(path)
+        n = min(n, len(offsets) - 1)
+        if n <= 0:
+            return []
+        
+        start = offsets[-n - 1]
+        with open(path, 'rb') as f:
+            f.seek(start)
+            data = f.read(offsets[-1] - start)
+        
+        records = []
+        for line in data.splitlines():
             try:
-                with open(self.monitoring_log_path, 'r') as f:
-                    return json.load(f)
-            except:
-                return []
-        return []
+                records.append(orjson.loads(line))
+            except orjson.JSONDecodeError:
+                continue  # torn or corrupt line
+        return records
     
-    def save_monitoring_log(self, log_data: dict):
-        """Save monitoring log to file"""
-        logs = self.load_monitoring_logs()
-        logs.append(log_data)
+    def _line_offsets(self, path: Path) -> array:
+        """
+        Byte offset of each line start in an NDJSON log, plus the file size as a sentinel
         
-        # Keep only last 500 entries
-        if len(logs) > 500:
-            logs = logs[-500:]
+        Loaded from the .bcl sidecar when it still matches the file size, otherwise
+        rebuilt with one scan. Kept in memory and extended on every append.
+        """
+        offsets = self._offsets.get(path)
+        if offsets is not None:
+            return offsets
+        
+        size = path.stat().st_size if path.exists() else 0
+        offsets = array('Q')
+        try:
+            with open(path.with_suffix('.bcl'), 'rb') as f:
+                offsets.frombytes(f.read())
+        except (OSError, ValueError):
+            offsets = array('Q')
         
-        with open(self.monitoring_log_path, 'w') as f:
-            json.dump(logs, f, indent=2)
+        if not offsets or offsets[0] != 0 or offsets[-1] != size:
+            offsets = array('Q', [0])
+            if size:
+                with open(path, 'rb') as f:
+                    for line in f:
+                        offsets.append(offsets[-1] + len(line))
+        
+        self._offsets[path] = offsets
+        return offsets
     
-    def save_alert(self, alert_data: dict):
-        """Save critical alerts to separate file"""
-        alerts = []
-        if self.alerts_path.exists():
-            try:
-                with open(self.alerts_path, 'r') as f:
-                    alerts = json.load(f)
-            except:
-                alerts = []
+    def _write_offsets(self, path: Path):
+        """Persist the in-memory offset index to the .bcl sidecar"""
+        offsets = self._offsets.get(path)
+        if offsets is not None:
+            with open(path.with_suffix('.bcl'), 'wb') as f:
+                offsets.tofile(f)
+    
+    def _append_record(self, path: Path, record: dict, max_entries: int):
+        """Append one record as an NDJSON line, compacting once ROTATE_SLACK lines over the cap"""
+        offsets = self._line_offsets(path)
         
-        alerts.append(alert_data)
+        # Handles stay open for the pass, so records coalesce in the buffer
+        # and reach disk in one write + fsync from _sync_appends()
+        f = self._append_files.get(path)
+        if f is None:
+            f = self._append_files[path] = open(path, 'ab', buffering=1 << 20)
+        line = orjson.dumps(record) + b"\n"
+        f.write(line)
+        offsets.append(offsets[-1] + len(line))
         
-        # Keep only last 100 alerts
-        if len(alerts) > 100:
-            alerts = alerts[-100:]
+        if len(offsets) - 1 >= max_entries + ROTATE_SLACK:
+            self._rotate_if_needed(path, max_entries)
+    
+    def _close_append(self, path: Path):
+        """Flush and close the open append handle for path, if any"""
+        f = self._append_files.pop(path, None)
+        if f is not None:
+            f.close()
+    
+    def _sync_appends(self):
+        """Flush, fsync and close all open append handles, then save their offset indexes"""
+        for path, f in self._append_files.items():
+            f.flush()
+            os.fsync(f.fileno())
+            f.close()
+            self._write_offsets(path)
+        self._append_files.clear()
+    
+    def _rotate_if_needed(self, path: Path, max_entries: int):
+        """Trim an NDJSON log to its last max_entries lines"""
+        self._close_append(path)
+        offsets = self._line_offsets(path)
+        if len(offsets) - 1 <= max_entries:
+            return
         
-        with open(self.alerts_path, 'w') as f:
-            json.dump(alerts, f, indent=2)
+        start = offsets[-max_entries - 1]
+        with open(path, 'rb') as f:
+            f.seek(start)
+            tail = f.read()
+        
+        # Write aside and rename over, so a crash never leaves a half-written log
+        tmp = path.with_suffix(path.suffix + ".tmp")
+        with open(tmp, 'wb') as f:
+            f.write(tail)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+        
+        self._offsets[path] = array('Q', (offset - start for offset in offsets[-max_entries - 1:]))
+        self._write_offsets(path)
+    
+    def save_monitoring_log(self, log_data: dict):
+        """Append monitoring log to file (keeps roughly the last 500 entries)"""
+        self._append_record(self.monitoring_log_path, log_data, MAX_MONITORING_LOGS)
+        if self._recent_reports is not None:
+            self._recent_reports.append(log_data)
+    
+    def save_alert(self, alert_data: dict) -> bool:
+        """
+        Append critical alert to separate file (keeps roughly the last 100 alerts)
+        
+        An alert with the same vehicle and issues as one saved within
+        ALERT_DEDUP_TTL_SEC is skipped, so a stuck sensor does not fill the window.
+        
+        Returns:
+            True if the alert was written, False if it was a duplicate
+        """
+        now = time.time()
+        recent = self._load_recent_alerts()
+        while recent and now - next(iter(recent.values())) >= ALERT_DEDUP_TTL_SEC:
+            recent.popitem(last=False)
+        
+        key = self._alert_key(alert_data)
+        if key in recent:
+            return False
+        recent[key] = now
+        self._append_record(self.alerts_path, alert_data, MAX_ALERTS)
+        return True
+    
+    @staticmethod
+    def _alert_key(alert_data: dict) -> str:
+        """Hash of the vehicle and its (sensor, issue) pairs"""
+        issues = sorted((i["sensor"], i["issue"]) for i in alert_data.get("issues", []))
+        return hashlib.sha256(orjson.dumps([alert_data.get("vehicle_id"), issues])).hexdigest()
+    
+    def _load_recent_alerts(self) -> OrderedDict:
+        """Seed the dedup window from alerts already on disk (each cron run is a new process)"""
+        if self._recent_alerts is not None:
+            return self._recent_alerts
+        self._recent_alerts = OrderedDict()
+        if not self.alerts_path.exists():
+            return self._recent_alerts
+        
+        cutoff = time.time() - ALERT_DEDUP_TTL_SEC
+        for alert in self._read_last(self.alerts_path, MAX_ALERTS + ROTATE_SLACK):
+            try:
+                ts = datetime.fromisoformat(alert["timestamp"]).timestamp()
+            except (KeyError, TypeError, ValueError):
+                continue
+            if ts >= cutoff:
+                key = self._alert_key(alert)
+                self._recent_alerts.pop(key, None)
+                self._recent_alerts[key] = ts
+        return self._recent_alerts
     
     def check_critical_sensors(self, vehicle_id: str) -> list:
         """
@@ -80,103 +309,155 @@ class MonitoringService:
         
         Returns list of critical issues found.
         """
-        sensors = self.data_manager.get_sensor_data(vehicle_id)
-        critical_issues = []
+        return self._find_critical_issues(self.data_manager.get_sensor_data(vehicle_id))
+    
+    def check_critical_sensors_batch(self, vehicle_ids: list, data_manager: VehicleDataManager = None) -> dict:
+        """
+        Run the critical sensor checks for a whole fleet in one pass.
         
-        # Check each sensor against critical thresholds
-        critical_checks = {
-            "engine_temp_c": (110, "Engine temperature critically high"),
-            "battery_voltage": (12.0, "Battery voltage critically low", lambda v: v < 12.0 or v > 15.0),
-            "oil_pressure_kpa": (150, "Oil pressure critically low"),
-            "coolant_temp_c": (105, "Coolant temperature critically high"),
-            "fuel_level_percent": (10, "Fuel level critically low"),
-            "brake_fluid_level_percent": (50, "Brake fluid critically low"),
-            "battery_soc": (10, "Battery charge critically low"),
+        The fleet's sensors come from a single get_all_vehicles() fetch instead
+        of a lookup per vehicle, and each threshold is applied across every
+        vehicle before moving to the next.
+        
+        Args:
+            vehicle_ids: Vehicles to check
+            data_manager: Data source for this pass (default: self.data_manager)
+        
+        Returns dict of vehicle_id -> list of critical issues.
+        """
+        data_manager = data_manager or self.data_manager
+        wanted = set(vehicle_ids)
+        fleet = {
+            vehicle.get("vehicle_id"): vehicle.get("available_sensor_fields", {})
+            for vehicle in data_manager.get_all_vehicles()
+            if vehicle and vehicle.get("vehicle_id") in wanted
         }
+        issues = self._find_fleet_critical_issues(fleet)
+        return {vehicle_id: issues.get(vehicle_id, []) for vehicle_id in vehicle_ids}
+    
+    def _find_critical_issues(self, sensors: dict) -> list:
+        """Evaluate one vehicle's sensor readings against the critical thresholds"""
+        return self._find_fleet_critical_issues({None: sensors})[None]
+    
+    @staticmethod
+    def _find_fleet_critical_issues(fleet: dict) -> dict:
+        """Evaluate vehicle_id -> sensor readings against the critical thresholds, one threshold at a time"""
+        critical_issues = {vehicle_id: [] for vehicle_id in fleet}
         
-        for sensor, check_info in critical_checks.items():
-            if sensor in sensors:
-                value = sensors[sensor]
-                
-                # Handle custom check function
-                if len(check_info) > 2 and callable(check_info[2]):
-                    if check_info[2](value):
-                        critical_issues.append({
+        # Check each sensor against critical thresholds
+        for sensor, (low, high, message) in CRITICAL_CHECKS.items():
+            for vehicle_id, sensors in fleet.items():
+                if sensor in sensors:
+                    value = sensors[sensor]
+                    if value < low or value > high:
+                        critical_issues[vehicle_id].append({
                             "sensor": sensor,
                             "value": value,
-                            "issue": check_info[1]
+                            "issue": message
                         })
-                else:
-                    threshold = check_info[0]
-                    message = check_info[1]
-                    
-                    # Check based on sensor type
-                    if "low" in message.lower():
-                        if value < threshold:
-                            critical_issues.append({
-                                "sensor": sensor,
-                                "value": value,
-                                "issue": message
-                            })
-                    else:  # "high" issues
-                        if value > threshold:
-                            critical_issues.append({
-                                "sensor": sensor,
-                                "value": value,
-                                "issue": message
-                            })
         
         # Check for DTC codes
-        if "dtc_codes" in sensors and sensors["dtc_codes"]:
-            critical_issues.append({
-                "sensor": "dtc_codes",
-                "value": sensors["dtc_codes"],
-                "issue": f"Diagnostic trouble codes detected: {', '.join(sensors['dtc_codes'])}"
-            })
+        for vehicle_id, sensors in fleet.items():
+            if "dtc_codes" in sensors and sensors["dtc_codes"]:
+                critical_issues[vehicle_id].append({
+                    "sensor": "dtc_codes",
+                    "value": sensors["dtc_codes"],
+                    "issue": f"Diagnostic trouble codes detected: {', '.join(sensors['dtc_codes'])}"
+                })
         
         return critical_issues
     
-    async def monitor_vehicle(self, vehicle_id: str) -> dict:
+    def _latest_reports(self) -> dict:
+        """Latest report per vehicle, seeded from the stored window (each cron run is a new process)"""
+        if self._last_reports is None:
+            self._last_reports = {report.get("vehicle_id"): report for report in self.get_last_monitoring_logs()}
+        return self._last_reports
+    
+    def _reusable_report(self, vehicle_id: str, sensor_hash: str):
+        """
+        The vehicle's previous report if its analysis can stand in for a new one
+        
+        That is: same sensor readings, a successful analysis, and the analysis
+        is younger than ANALYSIS_CACHE_MINUTES.
+        """
+        report = self._latest_reports().get(vehicle_id)
+        if not report or report.get("sensor_hash") != sensor_hash:
+            return None
+        if not isinstance(report.get("analysis"), dict) or "error" in report["analysis"]:
+            return None
+        try:
+            analysed_at = datetime.fromisoformat(report["analysis_timestamp"])
+        except (KeyError, TypeError, ValueError):
+            return None
+        if (datetime.now() - analysed_at).total_seconds() > ANALYSIS_CACHE_MINUTES * 60:
+            return None
+        return report
+    
+    async def monitor_vehicle(self, vehicle_id: str, critical_issues: list = None, data_manager: VehicleDataManager = None) -> dict:
         """
         Perform comprehensive monitoring for a single vehicle.
         
+        Args:
+            vehicle_id: Vehicle to monitor
+            critical_issues: Pre-computed critical sensor issues (checked here if None)
+            data_manager: Data source for this pass (default: self.data_manager)
+        
         Returns monitoring report with analysis and alerts.
         """
-        print(f"[{datetime.now().isoformat()}] Monitoring vehicle: {vehicle_id}")
+        # One timestamp per check, shared by the log line, report and alert
+        now_iso = datetime.now().isoformat()
+        print(f"[{now_iso}] Monitoring vehicle: {vehicle_id}")
+        
+        data_manager = data_manager or self.data_manager
+        sensors = data_manager.get_sensor_data(vehicle_id)
         
         # Check for critical issues first
-        critical_issues = self.check_critical_sensors(vehicle_id)
+        if critical_issues is None:
+            critical_issues = self._find_critical_issues(sensors)
+        issue_count = len(critical_issues)
         
-        # Get comprehensive AI analysis
-        try:
-            analysis = await get_comprehensive_analysis(vehicle_id, self.data_manager)
-        except Exception as e:
-            print(f"Error analyzing {vehicle_id}: {str(e)}")
-            analysis = {"error": str(e)}
+        # Reuse the last analysis if nothing changed; otherwise get comprehensive AI analysis
+        sensor_hash = hashlib.blake2b(orjson.dumps(sensors, option=orjson.OPT_SORT_KEYS), digest_size=16).hexdigest()
+        previous = None if critical_issues else self._reusable_report(vehicle_id, sensor_hash)
+        
+        if previous is not None:
+            analysis = previous["analysis"]
+            analysis_time = previous["analysis_timestamp"]
+        else:
+            try:
+                analysis = await get_comprehensive_analysis(vehicle_id, data_manager)
+            except Exception as e:
+                print(f"Error analyzing {vehicle_id}: {str(e)}")
+                analysis = {"error": str(e)}
+            analysis_time = datetime.now().isoformat()
         
         # Build monitoring report
         report = {
-            "timestamp": datetime.now().isoformat(),
+            "timestamp": now_iso,
             "vehicle_id": vehicle_id,
             "critical_issues": critical_issues,
-            "has_critical_alerts": len(critical_issues) > 0,
-            "analysis": analysis
+            "has_critical_alerts": issue_count > 0,
+            "analysis": analysis,
+            "analysis_reused": previous is not None,
+            "analysis_timestamp": analysis_time,
+            "sensor_hash": sensor_hash
         }
         
         # Save report
         self.save_monitoring_log(report)
+        self._latest_reports()[vehicle_id] = report
         
         # Save critical alerts separately
         if critical_issues:
             alert = {
-                "timestamp": datetime.now().isoformat(),
+                "timestamp": now_iso,
                 "vehicle_id": vehicle_id,
                 "severity": "CRITICAL",
                 "issues": critical_issues,
-                "message": f"Vehicle {vehicle_id} has {len(critical_issues)} critical issue(s) requiring immediate attention"
+                "message": f"Vehicle {vehicle_id} has {issue_count} critical issue(s) requiring immediate attention"
             }
-            self.save_alert(alert)
-            print(f"⚠️  CRITICAL ALERT for {vehicle_id}: {len(critical_issues)} issue(s)")
+            if self.save_alert(alert):
+                print(f"⚠️  CRITICAL ALERT for {vehicle_id}: {issue_count} issue(s)")
         
         return report
     
@@ -189,13 +470,25 @@ class MonitoringService:
         vehicle_ids = self.data_manager.get_vehicle_ids()
         print(f"Monitoring {len(vehicle_ids)} vehicles...")
         
-        total_critical = 0
+        # Sensor threshold checks are cheap and synchronous - do the whole fleet up front
+        # Vehicle records are built once for this pass and shared by the checks and agents
+        data_manager = RunScopedDataManager(self.data_manager)
+        critical_by_vehicle = self.check_critical_sensors_batch(vehicle_ids, data_manager)
+        
+        # Analyze vehicles concurrently, bounded so we don't flood the LLM API
+        sem = asyncio.Semaphore(MONITOR_CONCURRENCY)
+        
+        async def monitor_bounded(vehicle_id: str) -> dict:
+            async with sem:
+                return await self.monitor_vehicle(vehicle_id, critical_by_vehicle[vehicle_id], data_manager)
+        
+        reports = await asyncio.gather(*(monitor_bounded(v) for v in vehicle_ids))
+        total_critical = sum(report["has_critical_alerts"] for report in reports)
         
-        for vehicle_id in vehicle_ids:
-            report = await self.monitor_vehicle(vehicle_id)
-            
-            if report["has_critical_alerts"]:
-                total_critical += 1
+        # Each cron run is a fresh process, so trim once per run as well
+        self._sync_appends()
+        self._rotate_if_needed(self.monitoring_log_path, MAX_MONITORING_LOGS)
+        self._rotate_if_needed(self.alerts_path, MAX_ALERTS)
         
         print(f"\n{'='*60}")
         print(f"Monitoring complete!")
@@ -207,8 +500,20 @@ class MonitoringService:
         print(f"{'='*60}\n")
 
 
+def print_pretty_logs():
+    """Print the monitoring reports as indented JSON (logs are stored compact)"""
+    service = MonitoringService()
+    sys.stdout.write(orjson.dumps(list(service.load_monitoring_logs()), option=orjson.OPT_INDENT_2).decode())
+    sys.stdout.write("\n")
+
+
 def main():
     """Main function for cron job execution"""
+    # Human-readable dump of the stored reports: monitor_cron.py --pretty
+    if "--pretty" in sys.argv[1:]:
+        print_pretty_logs()
+        return
+    
     # Check for Gemini API key
     if not os.getenv("GEMINI_API_KEY"):
         print("ERROR: GEMINI_API_KEY environment variable not set!")
@@ -220,7 +525,7 @@ def main():
     
     # Run monitoring
     try:
-        asyncio.run(service.monitor_all_vehicles())
+        asyncio.run(service.run())
     except Exception as e:
         print(f"ERROR: Monitoring failed: {str(e)}")
         import traceback
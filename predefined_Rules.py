@@ -1,4 +1,6 @@
-import json
+import functools
+import mmap
+import orjson
 import os
 from typing import Dict, Any
 
@@ -10,20 +12,30 @@ BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 DB_PATH = os.path.join(BASE_DIR, "Manufacturing_Database.json")
 
 
+@functools.lru_cache(maxsize=1)
+def _load_mdb(path: str, mtime_ns: int) -> Dict[str, Any]:
+    """Parse the database straight from a read-only mmap; cached per (path, mtime)"""
+    with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        with memoryview(mm) as view:
+            return orjson.loads(view)
+
+
 def load_manufacturing_database() -> Dict[str, Any]:
     """
     Load manufacturing database from JSON.
-    Loaded once and injected into ruleGate.
+    Loaded once and injected into ruleGate; later calls return the cached dict
+    until the file's mtime changes.
     """
     # Use absolute path to handle any working directory
-    if not os.path.exists(DB_PATH):
+    try:
+        mtime_ns = os.stat(DB_PATH).st_mtime_ns
+    except FileNotFoundError:
         print(f"[WARNING] Manufacturing_Database.json not found at {DB_PATH}")
         # Return a default empty dict to allow continued operation
         return {}
     
     try:
-        with open(DB_PATH, "r", encoding="utf-8") as f:
-            return json.load(f)
+        return _load_mdb(DB_PATH, mtime_ns)
     except Exception as e:
         print(f"[ERROR] Failed to load manufacturing database: {e}")
         return {}
@@ -37,46 +49,44 @@ def ruleGate(packet: Dict[str, Any], MD: Dict[str, Any]) -> bool:
     """
     Runtime-safe rule gate.
 
+    Each sensor group dict is fetched once and reused values are kept in
+    locals, so a healthy packet costs one lookup per field.
+
     Returns:
         True  -> packet is healthy
         False -> anomaly detected
     """
+    battery = packet["battery_sensors"]
+    pack_current = battery["battery_pack_current_a"]
 
     # ---------------- Battery imbalance under load ----------------
-    cell_delta = (
-        packet["battery_sensors"]["battery_cell_max_voltage_v"]
-        - packet["battery_sensors"]["battery_cell_min_voltage_v"]
-    )
+    cell_delta = battery["battery_cell_max_voltage_v"] - battery["battery_cell_min_voltage_v"]
 
-    if cell_delta > 0.08 and packet["battery_sensors"]["battery_pack_current_a"] > 120:
+    if cell_delta > 0.08 and pack_current > 120:
         return False
 
     # ---------------- Thermal stress coupling ----------------
+    motor = packet["motor_inverter_sensors"]
     if (
-        packet["motor_inverter_sensors"]["motor_rpm"] > 7600
-        and packet["motor_inverter_sensors"]["inverter_temperature_c"] > 56
+        motor["motor_rpm"] > 7600
+        and motor["inverter_temperature_c"] > 56
         and packet["rate_of_change"]["battery_temp_rise_rate_c_per_min"] > 0.48
     ):
         return False
 
     # ---------------- Sustained electrical stress ----------------
-    if (
-        packet["battery_sensors"]["battery_pack_voltage_v"] < 370
-        and packet["battery_sensors"]["battery_pack_current_a"] > 125
-    ):
+    if battery["battery_pack_voltage_v"] < 370 and pack_current > 125:
         return False
 
     # ---------------- Signal consistency degradation ----------------
-    if (
-        packet["signal_consistency"]["gps_vs_wheel_speed_delta"] > 2.2
-        and packet["signal_consistency"]["wheel_speed_variance_ratio"] > 1.06
-    ):
+    signal = packet["signal_consistency"]
+    if signal["gps_vs_wheel_speed_delta"] > 2.2 and signal["wheel_speed_variance_ratio"] > 1.06:
         return False
 
     # ---------------- Thermal aging awareness ----------------
     if (
         packet["component_aging"]["thermal_cycle_count"] > 950
-        and packet["battery_sensors"]["battery_temperature_avg_c"] > 33.5
+        and battery["battery_temperature_avg_c"] > 33.5
     ):
         return False
 
@@ -84,7 +94,7 @@ def ruleGate(packet: Dict[str, Any], MD: Dict[str, Any]) -> bool:
     if (
         packet["environmental_sensors"]["ambient_air_temperature_c"] > 30
         and packet["operational_context"]["vehicle_load_estimated_kg"] > 220
-        and packet["battery_sensors"]["battery_pack_current_a"] > 122
+        and pack_current > 122
     ):
         return False
 
@@ -4,41 +4,58 @@ Converts markdown tables and text into clean JSON objects
 """
 
 import re
-from typing import Dict, List, Any
+from typing import Dict, Iterable, List, Any
 import json
 
 
-def parse_markdown_table(text: str) -> List[Dict[str, str]]:
+# Patterns are compiled once at import; these parsers run on every LLM response
+_VEHICLE_ID_RE = re.compile(r'\*\*Vehicle ID:\*\*\s*([^\n–]+?)\s*(?:–|$)')
+_SUMMARY_RE = re.compile(r'Vehicle ID:[^–]*–\s*([^\n]+)')
+
+# A metric's value starts at the first word beginning with one of these
+_METRIC_VALUE_START = frozenset('0123456789.-')
+
+# Tried in order; the first pattern that matches wins
+_VEHICLE_PATTERNS = tuple(re.compile(p, re.IGNORECASE) for p in (
+    r'\*\*Vehicle ID:\*\*\s*([^\n–]+?)\s*(?:–|$)',
+    r'Vehicle ID:\s*([^\n–]+?)\s*(?:–|$)',
+    r'\*\*Vehicle ID:\*\*\s*([^\n]+)',
+    r'vehicle_id["\']?\s*:\s*["\']?([^"\'\n,]+)'
+))
+_RISK_PATTERNS = tuple(re.compile(p, re.IGNORECASE) for p in (
+    r'Safety criticality[:\s]+([^\n,;]+)',
+    r'Criticality[:\s]+([^\n,;]+)',
+    r'Risk[:\s]+(High|Medium|Low|Critical)'
+))
+
+
+def _parse_pipe_table(lines: Iterable[str], header_key: str) -> List[Dict[str, str]]:
     """
-    Parse markdown table from text into list of dictionaries
+    Parse the first markdown table whose header row contains header_key
     
-    Example input:
-    | Category | Summary | Key Values |
-    |----------|---------|------------|
-    | Battery  | Good    | SOC 67%... |
+    Takes the response already split into lines (any iterable), so callers
+    parsing several tables out of one response split it only once. The lines
+    are consumed in a single pass: scan to the header, skip the separator,
+    then read rows.
+    Rows with a different number of columns than the header are skipped.
     
-    Returns: [{"Category": "Battery", "Summary": "Good", "Key Values": "SOC 67%..."}]
+    Returns: list of {header: value} dicts
     """
-    lines = text.strip().split('\n')
+    it = iter(lines)
     
-    # Find header line (first line with pipes)
-    header_idx = -1
-    for i, line in enumerate(lines):
-        if '|' in line and 'Category' in line:
-            header_idx = i
+    # Find header line (cheap substring checks, no split until it matches)
+    for line in it:
+        if header_key in line and '|' in line:
+            headers = [h.strip() for h in line.split('|')[1:-1]]
             break
-    
-    if header_idx == -1:
+    else:
         return []
     
-    # Extract header
-    header_line = lines[header_idx]
-    headers = [h.strip() for h in header_line.split('|')[1:-1]]
-    
     # Skip separator line and empty lines
+    next(it, None)
     data = []
-    for i in range(header_idx + 2, len(lines)):
-        line = lines[i].strip()
+    for line in it:
+        line = line.strip()
         
         if not line or '|' not in line:
             continue
@@ -47,12 +64,25 @@ def parse_markdown_table(text: str) -> List[Dict[str, str]]:
         
         # Only add if we have correct number of columns
         if len(values) == len(headers):
-            row = {header: value for header, value in zip(headers, values)}
-            data.append(row)
+            data.append(dict(zip(headers, values)))
     
     return data
 
 
+def parse_markdown_table(text: str) -> List[Dict[str, str]]:
+    """
+    Parse markdown table from text into list of dictionaries
+    
+    Example input:
+    | Category | Summary | Key Values |
+    |----------|---------|------------|
+    | Battery  | Good    | SOC 67%... |
+    
+    Returns: [{"Category": "Battery", "Summary": "Good", "Key Values": "SOC 67%..."}]
+    """
+    return _parse_pipe_table(text.splitlines(), 'Category')
+
+
 def parse_vehicle_analysis(text: str) -> Dict[str, Any]:
     """
     Parse complete LLM analysis response into structured JSON
@@ -74,12 +104,12 @@ def parse_vehicle_analysis(text: str) -> Dict[str, Any]:
     }
     
     # Extract Vehicle ID and summary
-    vehicle_match = re.search(r'\*\*Vehicle ID:\*\*\s*([^\n–]+?)\s*(?:–|$)', text)
+    vehicle_match = _VEHICLE_ID_RE.search(text)
     if vehicle_match:
         result["vehicle_id"] = vehicle_match.group(1).strip()
     
     # Extract summary line (everything after the dash on Vehicle ID line)
-    summary_match = re.search(r'Vehicle ID:[^–]*–\s*([^\n]+)', text)
+    summary_match = _SUMMARY_RE.search(text)
     if summary_match:
         result["summary"] = summary_match.group(1).strip()
     
@@ -122,19 +152,19 @@ def extract_metrics(key_values_text: str) -> Dict[str, str]:
     metrics = {}
     
     # Split by comma or semicolon
-    parts = re.split(r'[,;]', key_values_text)
-    
-    for part in parts:
-        part = part.strip()
-        if not part:
-            continue
+    for part in key_values_text.replace(';', ',').split(','):
+        # "NAME value" or "NAME value UNIT": the value starts at the first numeric
+        # word after at least one name word, so names like "12V battery" survive
+        words = part.split()
+        for i in range(1, len(words)):
+            if words[i][0] in _METRIC_VALUE_START:
+                break
+        else:
+            continue  # no value
         
-        # Match pattern: "NAME value" or "NAME value UNIT"
-        match = re.match(r'([A-Za-z0-9_\s]+?)\s+([\d\.\-\s°\/°C]+(?:\s*[%°A-Za-z/]*)?)', part)
-        if match:
-            key = match.group(1).strip()
-            value = match.group(2).strip()
-            metrics[key] = value
+        name = ' '.join(words[:i]).rstrip(':').rstrip()
+        if name:
+            metrics[name] = ' '.join(words[i:])
     
     return metrics
 
@@ -192,37 +222,7 @@ def parse_rca_table(text: str) -> List[Dict[str, str]]:
     
     Returns list of dictionaries
     """
-    lines = text.strip().split('\n')
-    
-    # Find RCA header line
-    header_idx = -1
-    for i, line in enumerate(lines):
-        if '|' in line and 'Failure Component' in line:
-            header_idx = i
-            break
-    
-    if header_idx == -1:
-        return []
-    
-    # Extract header
-    header_line = lines[header_idx]
-    headers = [h.strip() for h in header_line.split('|')[1:-1]]
-    
-    # Skip separator line
-    data = []
-    for i in range(header_idx + 2, len(lines)):
-        line = lines[i].strip()
-        
-        if not line or '|' not in line:
-            continue
-        
-        values = [v.strip() for v in line.split('|')[1:-1]]
-        
-        if len(values) == len(headers):
-            row = {header: value for header, value in zip(headers, values)}
-            data.append(row)
-    
-    return data
+    return _parse_pipe_table(text.splitlines(), 'Failure Component')
 
 
 def parse_capa_table(text: str) -> List[Dict[str, str]]:
@@ -234,37 +234,7 @@ def parse_capa_table(text: str) -> List[Dict[str, str]]:
     
     Returns list of dictionaries
     """
-    lines = text.strip().split('\n')
-    
-    # Find CAPA header line
-    header_idx = -1
-    for i, line in enumerate(lines):
-        if '|' in line and 'Action Type' in line:
-            header_idx = i
-            break
-    
-    if header_idx == -1:
-        return []
-    
-    # Extract header
-    header_line = lines[header_idx]
-    headers = [h.strip() for h in header_line.split('|')[1:-1]]
-    
-    # Skip separator line
-    data = []
-    for i in range(header_idx + 2, len(lines)):
-        line = lines[i].strip()
-        
-        if not line or '|' not in line:
-            continue
-        
-        values = [v.strip() for v in line.split('|')[1:-1]]
-        
-        if len(values) == len(headers):
-            row = {header: value for header, value in zip(headers, values)}
-            data.append(row)
-    
-    return data
+    return _parse_pipe_table(text.splitlines(), 'Action Type')
 
 
 def parse_rca_capa_response(text: str) -> Dict[str, Any]:
@@ -293,21 +263,17 @@ def parse_rca_capa_response(text: str) -> Dict[str, Any]:
         return result
     
     # Extract Vehicle ID - try multiple patterns
-    vehicle_patterns = [
-        r'\*\*Vehicle ID:\*\*\s*([^\n–]+?)\s*(?:–|$)',
-        r'Vehicle ID:\s*([^\n–]+?)\s*(?:–|$)',
-        r'\*\*Vehicle ID:\*\*\s*([^\n]+)',
-        r'vehicle_id["\']?\s*:\s*["\']?([^"\'\n,]+)'
-    ]
-    
-    for pattern in vehicle_patterns:
-        vehicle_match = re.search(pattern, text, re.IGNORECASE)
+    for pattern in _VEHICLE_PATTERNS:
+        vehicle_match = pattern.search(text)
         if vehicle_match:
             result["vehicle_id"] = vehicle_match.group(1).strip()
             break
     
+    # Split once; both tables are parsed from the same lines
+    lines = text.splitlines()
+    
     # Parse RCA table
-    rca_data = parse_rca_table(text)
+    rca_data = _parse_pipe_table(lines, 'Failure Component')
     if rca_data:
         result["rca_analysis"] = rca_data
         # Extract unique components from RCA
@@ -319,7 +285,7 @@ def parse_rca_capa_response(text: str) -> Dict[str, Any]:
         result["affected_components"] = list(components) if components else None
     
     # Parse CAPA table
-    capa_data = parse_capa_table(text)
+    capa_data = _parse_pipe_table(lines, 'Action Type')
     if capa_data:
         result["capa_analysis"] = capa_data
         # Extract OEM owners from CAPA
@@ -331,14 +297,8 @@ def parse_rca_capa_response(text: str) -> Dict[str, Any]:
         result["oem_owners"] = list(owners)
     
     # Extract risk assessments - try multiple patterns
-    risk_patterns = [
-        r'Safety criticality[:\s]+([^\n,;]+)',
-        r'Criticality[:\s]+([^\n,;]+)',
-        r'Risk[:\s]+(High|Medium|Low|Critical)'
-    ]
-    
-    for pattern in risk_patterns:
-        risk_match = re.search(pattern, text, re.IGNORECASE)
+    for pattern in _RISK_PATTERNS:
+        risk_match = pattern.search(text)
         if risk_match:
             result["safety_criticality"] = risk_match.group(1).strip()
             break
@@ -0,0 +1,247 @@
+"""
+Cross-worker shared state for the streaming API
+
+When the app runs with several Uvicorn/Gunicorn workers each process has its
+own globals, so counters diverge and every worker starts its own stream.
+Setting REDIS_URL (and installing the `redis` package) moves the counters to
+Redis atomic INCRs and elects a single streaming worker through a SET NX lease,
+which the leader renews on a timer and any worker may take over once it lapses.
+The leader also publishes its rolling buffer, retained anomalies and latest
+analysis, so workers that do not stream serve the same data.
+Without Redis everything falls back to in-process state, matching the
+single-worker behaviour.
+"""
+import logging
+import os
+import threading
+import time
+import uuid
+from typing import Dict, List, Optional
+
+import orjson
+
+try:
+    import redis
+    from redis.exceptions import WatchError
+    REDIS_AVAILABLE = True
+except ImportError:
+    redis = None
+    WatchError = None
+    REDIS_AVAILABLE = False
+
+REDIS_URL = os.getenv("REDIS_URL")
+KEY_PREFIX = os.getenv("REDIS_KEY_PREFIX", "vfp:")
+STREAM_LEASE_TTL_SEC = 30
+STREAM_LEASE_RENEW_SEC = 10  # Renew / takeover check interval; well under the TTL
+
+logger = logging.getLogger("shared_state")
+
+
+class SharedCounters:
+    """Integer counters shared across workers via Redis, or kept in-process"""
+
+    def __init__(self, url: Optional[str] = REDIS_URL, prefix: str = KEY_PREFIX):
+        self.prefix = prefix
+        self.worker_id = uuid.uuid4().hex
+        self.client = None
+        self._local: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        self._lease_renewed_at = 0.0  # monotonic time of the last successful acquire/renew
+
+        if url and not REDIS_AVAILABLE:
+            logger.warning("REDIS_URL set but redis package not installed, using in-process counters")
+        elif url:
+            try:
+                self.client = redis.Redis.from_url(url, socket_timeout=2, socket_connect_timeout=2)
+                self.client.ping()
+                logger.info("Connected - counters shared across workers")
+            except Exception as e:
+                logger.error("%s - using in-process counters", e)
+                self.client = None
+
+    @property
+    def shared(self) -> bool:
+        return self.client is not None
+
+    def incr(self, name: str, amount: int = 1) -> int:
+        """Atomically add amount to a counter and return the new value"""
+        if self.client is not None:
+            try:
+                return int(self.client.incrby(self.prefix + name, amount))
+            except Exception:
+                pass
+        with self._lock:
+            self._local[name] = self._local.get(name, 0) + amount
+            return self._local[name]
+
+    def get(self, name: str) -> int:
+        """Current counter value (0 if never incremented)"""
+        if self.client is not None:
+            try:
+                return int(self.client.get(self.prefix + name) or 0)
+            except Exception:
+                pass
+        return self._local.get(name, 0)
+
+    def reset(self, *names: str) -> None:
+        """Zero the given counters"""
+        if self.client is not None:
+            try:
+                self.client.delete(*(self.prefix + n for n in names))
+            except Exception:
+                pass
+        with self._lock:
+            for n in names:
+                self._local[n] = 0
+
+    # ------------------------------------------------------------------
+    # Stream leader lease
+    # ------------------------------------------------------------------
+
+    def acquire_stream_lease(self, ttl: int = STREAM_LEASE_TTL_SEC) -> bool:
+        """
+        Try to become the single worker that runs the packet stream.
+
+        Returns:
+            True if this worker holds the lease (always True without Redis)
+        """
+        if self.client is None:
+            return True
+        try:
+            acquired = bool(self.client.set(self.prefix + "stream_lease", self.worker_id, nx=True, ex=ttl))
+        except Exception:
+            return False
+        if acquired:
+            self._lease_renewed_at = time.monotonic()
+        return acquired
+
+    def renew_stream_lease(self, ttl: int = STREAM_LEASE_TTL_SEC) -> bool:
+        """
+        Extend the lease if this worker owns it, or take it back if it lapsed.
+
+        The owner check and the SET run in one WATCH/MULTI transaction, so a
+        lease grabbed by another worker in between is never overwritten.
+
+        Returns:
+            False when another worker holds the lease. After a Redis error the
+            lease may still be ours, so it returns True until ttl seconds have
+            passed since the last successful renewal - by then the key has
+            expired and another worker may be streaming
+        """
+        if self.client is None:
+            return True
+        key = self.prefix + "stream_lease"
+        try:
+            with self.client.pipeline() as pipe:
+                pipe.watch(key)
+                owner = pipe.get(key)
+                if owner is not None and owner != self.worker_id.encode():
+                    return False
+                pipe.multi()
+                pipe.set(key, self.worker_id, ex=ttl)
+                pipe.execute()
+            self._lease_renewed_at = time.monotonic()
+            return True
+        except WatchError:
+            return False
+        except Exception as e:
+            still_held = time.monotonic() - self._lease_renewed_at < ttl
+            logger.warning("Stream lease renewal failed (%s), %s", e,
+                           "keeping stream" if still_held else "lease expired, stopping stream")
+            return still_held
+
+    def release_stream_lease(self) -> None:
+        """Drop the lease on shutdown so another worker can take over"""
+        if self.client is None:
+            return
+        try:
+            key = self.prefix + "stream_lease"
+            if self.client.get(key) == self.worker_id.encode():
+                self.client.delete(key)
+        except Exception:
+            pass
+
+    def stream_leased(self) -> bool:
+        """True while some worker holds the stream lease"""
+        if self.client is None:
+            return False
+        try:
+            return bool(self.client.exists(self.prefix + "stream_lease"))
+        except Exception:
+            return False
+
+    # ------------------------------------------------------------------
+    # Stream snapshot for workers that do not stream
+    # ------------------------------------------------------------------
+
+    def clear_stream_state(self) -> None:
+        """Drop the published buffer, anomalies and latest analysis"""
+        if self.client is None:
+            return
+        try:
+            self.client.delete(*(self.prefix + n for n in ("stream_buffer", "stream_anomalies", "latest_analysis")))
+        except Exception:
+            pass
+
+    def _push(self, name: str, raw: bytes, maxlen: int) -> None:
+        """Append to a capped Redis list"""
+        try:
+            key = self.prefix + name
+            with self.client.pipeline(transaction=False) as pipe:
+                pipe.rpush(key, raw)
+                pipe.ltrim(key, -maxlen, -1)
+                pipe.execute()
+        except Exception:
+            pass
+
+    def _range(self, name: str) -> List[dict]:
+        """Decode every entry of a published list, oldest first"""
+        try:
+            return [orjson.loads(raw) for raw in self.client.lrange(self.prefix + name, 0, -1)]
+        except Exception:
+            return []
+
+    def publish_packet(self, packet: dict, maxlen: int) -> None:
+        """Append a streamed packet to the shared rolling buffer"""
+        if self.client is not None:
+            self._push("stream_buffer", orjson.dumps(packet, default=str), maxlen)
+
+    def publish_anomaly(self, document: dict, maxlen: int) -> None:
+        """Append an anomaly document to the shared anomaly ring"""
+        if self.client is not None:
+            self._push("stream_anomalies", orjson.dumps(document, default=str), maxlen)
+
+    def publish_latest_analysis(self, raw: bytes) -> None:
+        """Store the orjson-encoded latest analysis"""
+        if self.client is None:
+            return
+        try:
+            self.client.set(self.prefix + "latest_analysis", raw)
+        except Exception:
+            pass
+
+    def stream_buffer(self) -> List[dict]:
+        """Packets in the leader's rolling buffer, oldest first"""
+        return self._range("stream_buffer") if self.client is not None else []
+
+    def stream_buffer_size(self) -> int:
+        """Length of the leader's rolling buffer"""
+        if self.client is None:
+            return 0
+        try:
+            return int(self.client.llen(self.prefix + "stream_buffer"))
+        except Exception:
+            return 0
+
+    def stream_anomalies(self) -> List[dict]:
+        """Anomaly documents retained by the leader, oldest first"""
+        return self._range("stream_anomalies") if self.client is not None else []
+
+    def latest_analysis(self) -> Optional[bytes]:
+        """The leader's orjson-encoded latest analysis, or None"""
+        if self.client is None:
+            return None
+        try:
+            return self.client.get(self.prefix + "latest_analysis")
+        except Exception:
+            return None
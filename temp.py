@@ -11,20 +11,31 @@ Configuration:
 - Set ENABLE_AI_ANALYSIS=True to call AI agents
 - Set ENABLE_AI_ANALYSIS=False for testing without API keys
 """
-import time
-import json
 import asyncio
-from collections import deque
+import logging
+import sys
+import time
+from collections import OrderedDict, deque
 from datetime import datetime, UTC
 from decimal import Decimal
-from typing import List, Dict, Any
+from itertools import cycle
+from typing import List, Dict, Any, AsyncIterator, Iterable, Iterator, Optional, Sequence, Set, Tuple
 
-from temp2 import ruleGate, load_manufacturing_database
+import orjson
+
+try:
+    import ijson
+    IJSON_AVAILABLE = True
+except ImportError:
+    ijson = None
+    IJSON_AVAILABLE = False
+
+from temp2 import PacketView, packet_view, ruleGate, ruleMask, rules_fired, load_manufacturing_database
 
 # AI agent imports - only loaded if ENABLE_AI_ANALYSIS=True
 try:
     from agents_final import route_query
-    from utils import VehicleDataManager
+    from utils import get_data_manager
     AI_AVAILABLE = True
 except ImportError:
     AI_AVAILABLE = False
@@ -37,10 +48,21 @@ BUFFER_SIZE_SECONDS = 5 * 60  # 5 minutes rolling buffer
 HIGH_IGNITION_SLEEP_SEC = 1  # 1 second when driving
 LOW_IGNITION_SLEEP_SEC = 45 * 60  # 45 minutes when parked
 ENABLE_AI_ANALYSIS = False  # Set to True after installing requirements.txt
+STREAM_PACKET_FILE = False  # Parse FILE_NAME lazily with ijson (constant memory for large logs)
+AI_BATCH_MAX = 8  # Most anomalies combined into one agent call
+AI_BATCH_WAIT_MS = 200  # How long a batch waits for more anomalies before it is sent
+AI_MAX_CONCURRENT = 4  # Agent calls allowed in flight at once
+AI_REQUESTS_PER_MINUTE = 30  # Sustained agent call rate (provider RPM cap)
+AI_RATE_BURST = 5  # Calls allowed back to back before the RPM pacing applies
+AI_CALL_TIMEOUT_SEC = 30  # Give up on an agent call after this long
+AI_CACHE_SIZE = 512  # Analyses kept for reuse by anomalies with the same signature
+TICK_LOG_LEVEL = logging.INFO  # Set to logging.WARNING to drop per-tick lines (production / piped runs)
 user = True  # Global flag to control execution
 
 # =======================================================================
 
+tick_logger = logging.getLogger("stream_monitor")
+
 
 def get_initial_ignition_status() -> int:
     """Get initial ignition status (1=on, 0=off)"""
@@ -54,75 +76,313 @@ def convert_decimal(obj: Any) -> Any:
     return obj
 
 
-def normalize_packet(packet: Dict) -> Dict:
-    """Normalize packet by converting Decimal to float"""
-    return json.loads(json.dumps(packet, default=convert_decimal))
+def normalize_packet(packet: Any) -> Any:
+    """Normalize packet by converting Decimal to float (walks dicts and lists)"""
+    if isinstance(packet, dict):
+        return {k: normalize_packet(v) for k, v in packet.items()}
+    if isinstance(packet, list):
+        return [normalize_packet(v) for v in packet]
+    return convert_decimal(packet)
+
+
+# Prompt templates for stream anomalies; readings are rounded to sensor
+# precision so the prompt carries no 15-digit float noise
+ANOMALY_EVENT_TMPL = (
+    "T+{t}s - Battery: {bv:.1f}V, {ba:.1f}A, temp {bt:.1f}°C. Motor: {rpm:.0f} RPM. "
+    "Inverter temp: {it:.1f}°C. Cell voltage delta: {cd:.3f}V."
+)
+ANOMALY_QUERY_TMPL = (
+    "URGENT: Vehicle anomaly detected. Analyze the situation and provide immediate "
+    "guidance. Last packet data: {events} Provide: 1) Root cause, 2) Severity "
+    "(Critical/Warning/Info), 3) Immediate actions, 4) Risk assessment."
+)
+ANOMALY_BATCH_QUERY_TMPL = (
+    "URGENT: {n} vehicle anomalies detected in quick succession. Analyze them together "
+    "and provide immediate guidance. Packet data per anomaly: {events} Provide: "
+    "1) Root cause, 2) Severity (Critical/Warning/Info), 3) Immediate actions, "
+    "4) Risk assessment."
+)
+
+
+def build_anomaly_query(events: List[str]) -> str:
+    """Diagnostic prompt covering one or more anomaly event descriptions"""
+    if len(events) == 1:
+        return ANOMALY_QUERY_TMPL.format(events=events[0])
+    listed = " ".join(f"({i}) {event}" for i, event in enumerate(events, 1))
+    return ANOMALY_BATCH_QUERY_TMPL.format(n=len(events), events=listed)
+
+
+class RateLimiter:
+    """Token bucket: `burst` calls at once, refilled at `per_minute` calls per minute"""
+
+    def __init__(self, per_minute: int = AI_REQUESTS_PER_MINUTE, burst: int = AI_RATE_BURST):
+        self.rate = per_minute / 60
+        self.capacity = burst
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+
+    async def acquire(self) -> None:
+        """Wait until a call may be made, then spend one token"""
+        while True:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return
+            await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+class AnomalyBatcher:
+    """
+    Coalesces anomaly analyses into shared route_query calls.
+
+    A single drain task takes the first queued anomaly, collects whatever else
+    arrives within max_wait_ms or is already waiting (up to max_batch), and
+    sends one combined prompt. A batch is only collected once a concurrency
+    slot and a rate-limit token are free, so anomalies that fire while the
+    agent is busy or throttled queue up and go out together; a burst costs one
+    agent round trip per batch rather than one per second.
+    """
+
+    def __init__(
+        self,
+        max_batch: int = AI_BATCH_MAX,
+        max_wait_ms: int = AI_BATCH_WAIT_MS,
+        max_concurrent: int = AI_MAX_CONCURRENT,
+        limiter: Optional[RateLimiter] = None,
+        timeout: float = AI_CALL_TIMEOUT_SEC
+    ):
+        self.max_batch = max_batch
+        self.max_wait = max_wait_ms / 1000
+        self.max_concurrent = max_concurrent
+        self.limiter = limiter or RateLimiter()
+        self.timeout = timeout
+        self._queue: Optional[asyncio.Queue] = None
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._drain: Optional[asyncio.Task] = None
+        self._inflight: Set[asyncio.Task] = set()
+
+    async def run(self, second_index: int, event: str, data_manager=None) -> Dict[str, Any]:
+        """
+        Queue one anomaly and wait for the analysis of the batch it lands in.
+
+        Returns:
+            route_query result plus "batch": second indices sharing the response
+        """
+        if self._drain is None or self._drain.done():
+            self._queue = asyncio.Queue()
+            self._slots = asyncio.Semaphore(self.max_concurrent)
+            self._drain = asyncio.create_task(self._drain_loop())
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((second_index, event, data_manager, future))
+        return await future
+
+    async def _collect(self) -> List[tuple]:
+        """Wait for one item, then gather more until the window or batch fills"""
+        loop = asyncio.get_running_loop()
+        batch = [await self._queue.get()]
+        deadline = loop.time() + self.max_wait
+        while len(batch) < self.max_batch:
+            if not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+                continue
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), remaining))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _drain_loop(self) -> None:
+        while True:
+            await self._slots.acquire()
+            try:
+                await self.limiter.acquire()
+                batch = await self._collect()
+            except BaseException:
+                self._slots.release()
+                raise
+            task = asyncio.create_task(self._send(batch))
+            self._inflight.add(task)
+            task.add_done_callback(self._inflight.discard)
+
+    async def _send(self, batch: List[tuple]) -> None:
+        """Run one agent call for a batch and resolve its waiters"""
+        try:
+            result = await asyncio.wait_for(
+                route_query(
+                    query=build_anomaly_query([item[1] for item in batch]),
+                    vehicle_id="XUV400_Stream",
+                    data_manager=batch[0][2]
+                ),
+                timeout=self.timeout
+            )
+            result = {**result, "batch": [item[0] for item in batch]}
+        except asyncio.CancelledError:
+            for *_, future in batch:
+                future.cancel()
+            raise
+        except Exception as e:
+            if isinstance(e, asyncio.TimeoutError):
+                e = TimeoutError(f"agent call timed out after {self.timeout}s")
+            for *_, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        finally:
+            self._slots.release()
+        for *_, future in batch:
+            if not future.done():
+                future.set_result(result)
+
+    async def aclose(self) -> None:
+        """Stop the drain task and in-flight calls; call before the event loop shuts down"""
+        tasks = list(self._inflight)
+        if self._drain is not None:
+            tasks.append(self._drain)
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        while self._queue is not None and not self._queue.empty():
+            *_, future = self._queue.get_nowait()
+            future.cancel()
+        self._drain = None
+        self._queue = None
+        self._slots = None
+
+
+anomaly_batcher = AnomalyBatcher()
+
+# Agent results by anomaly signature (LRU), and calls still running per signature
+_analysis_cache: "OrderedDict[tuple, Dict[str, Any]]" = OrderedDict()
+_analysis_inflight: Dict[tuple, asyncio.Task] = {}
+
+
+def anomaly_signature(
+    battery_v: float,
+    battery_a: float,
+    motor_rpm: float,
+    battery_temp: float,
+    inverter_temp: float,
+    cell_delta: float
+) -> tuple:
+    """Key metrics rounded to sensor precision; equal signatures share an analysis"""
+    return (
+        round(battery_v), round(battery_a), round(motor_rpm, -2),
+        round(battery_temp), round(inverter_temp), round(cell_delta, 2)
+    )
+
+
+def _store_analysis(signature: tuple, task: asyncio.Task) -> None:
+    _analysis_inflight.pop(signature, None)
+    if task.cancelled() or task.exception() is not None:
+        return
+    _analysis_cache[signature] = task.result()
+    while len(_analysis_cache) > AI_CACHE_SIZE:
+        _analysis_cache.popitem(last=False)
 
 
-async def send_buffer_to_llm(
-    buffer: deque,
+async def analyze_anomaly(
+    signature: tuple,
     second_index: int,
-    packet: Dict,
+    event: str,
     data_manager=None
-) -> None:
-    """Send buffer to AI agents for analysis when anomaly detected"""
-    payload = {
-        "event_time_utc": datetime.now(UTC).isoformat(),
-        "failure_second_index": second_index,
-        "buffer_size": len(buffer),
-    }
-
+) -> Tuple[Dict[str, Any], bool]:
+    """
+    Agent analysis for an anomaly, reusing the result for a repeated signature.
+    Concurrent anomalies with the same signature wait on one call.
+
+    Returns:
+        (route_query result with "batch", True if it came from another anomaly)
+    """
+    cached = _analysis_cache.get(signature)
+    if cached is not None:
+        _analysis_cache.move_to_end(signature)
+        return cached, True
+
+    task = _analysis_inflight.get(signature)
+    reused = task is not None
+    if task is None:
+        task = asyncio.create_task(anomaly_batcher.run(second_index, event, data_manager))
+        _analysis_inflight[signature] = task
+        task.add_done_callback(lambda t: _store_analysis(signature, t))
+    return await asyncio.shield(task), reused
+
+
+def print_anomaly_banner(second_index: int, buffer_size: int, fired: Sequence[str] = ()) -> None:
+    """Header printed for every detected anomaly"""
     print("\n" + "=" * 80)
     print("🚨 ANOMALY DETECTED")
     print("=" * 80)
-    print(f"Timestamp: {payload['event_time_utc']}")
+    print(f"Timestamp: {datetime.now(UTC).isoformat()}")
     print(f"Failure at second: {second_index}")
-    print(f"Buffer size: {len(buffer)} packets")
+    print(f"Buffer size: {buffer_size} packets")
+    if fired:
+        print(f"Rules fired: {', '.join(fired)}")
+
+
+def report_anomaly(buffer: deque, second_index: int, packet: Dict, fired: Sequence[str] = ()) -> None:
+    """Report an anomaly without AI analysis; runs inline in the stream loop"""
+    print_anomaly_banner(second_index, len(buffer), fired)
+    print_anomaly_summary(packet, second_index)
+    print("=" * 80 + "\n")
+
+
+async def send_buffer_to_llm(
+    buffer: deque,
+    second_index: int,
+    packet: Dict,
+    data_manager=None,
+    fired: Sequence[str] = ()
+) -> None:
+    """Send buffer to AI agents for analysis when anomaly detected"""
+    print_anomaly_banner(second_index, len(buffer), fired)
     
-    if ENABLE_AI_ANALYSIS and AI_AVAILABLE:
-        try:
-            # Extract key metrics from last packet
-            battery_v = packet['battery_sensors']['battery_pack_voltage_v']
-            battery_a = packet['battery_sensors']['battery_pack_current_a']
-            motor_rpm = packet['motor_inverter_sensors']['motor_rpm']
-            battery_temp = packet['battery_sensors']['battery_temperature_avg_c']
-            inverter_temp = packet['motor_inverter_sensors']['inverter_temperature_c']
-            cell_delta = (
-                packet['battery_sensors']['battery_cell_max_voltage_v'] -
-                packet['battery_sensors']['battery_cell_min_voltage_v']
-            )
-            
-            # Create a diagnostic query
-            query = (
-                f"URGENT: Vehicle anomaly detected at T+{second_index}s. "
-                f"Analyze the situation and provide immediate guidance. "
-                f"Last packet data: "
-                f"Battery: {battery_v}V, {battery_a}A, temp {battery_temp}°C. "
-                f"Motor: {motor_rpm} RPM. "
-                f"Inverter temp: {inverter_temp}°C. "
-                f"Cell voltage delta: {cell_delta:.3f}V. "
-                f"Provide: 1) Root cause, 2) Severity (Critical/Warning/Info), "
-                f"3) Immediate actions, 4) Risk assessment."
-            )
-            
-            print("\nCalling AI Diagnostic Agent...")
-            result = await route_query(
-                query=query,
-                vehicle_id="XUV400_Stream",
-                data_manager=data_manager
-            )
-            
+    try:
+        # Extract key metrics from last packet
+        battery = packet['battery_sensors']
+        motor = packet['motor_inverter_sensors']
+        battery_v = battery['battery_pack_voltage_v']
+        battery_a = battery['battery_pack_current_a']
+        motor_rpm = motor['motor_rpm']
+        battery_temp = battery['battery_temperature_avg_c']
+        inverter_temp = motor['inverter_temperature_c']
+        cell_delta = battery['battery_cell_max_voltage_v'] - battery['battery_cell_min_voltage_v']
+        
+        # Describe this anomaly; the batcher wraps it in the diagnostic prompt
+        event = ANOMALY_EVENT_TMPL.format(
+            t=second_index, bv=battery_v, ba=battery_a, bt=battery_temp,
+            rpm=motor_rpm, it=inverter_temp, cd=cell_delta
+        )
+        if fired:
+            event += f" Rules fired: {', '.join(fired)}."
+        
+        signature = anomaly_signature(
+            battery_v, battery_a, motor_rpm, battery_temp, inverter_temp, cell_delta
+        )
+        
+        print("\nCalling AI Diagnostic Agent...")
+        result, reused = await analyze_anomaly(signature, second_index, event, data_manager)
+        
+        batch = result["batch"]
+        if reused:
+            print(f"AI analysis reused from the anomaly at T+{batch[0]}s (same signature)")
+        elif batch[0] != second_index:
+            print(f"AI analysis shared with the anomaly at T+{batch[0]}s (batch of {len(batch)})")
+        else:
             print(f"\n{'=' * 80}")
-            print(f"AI AGENT: {result['agent']}")
+            print(f"AI AGENT: {result['agent']}"
+                  f"{f' (batch of {len(batch)} anomalies)' if len(batch) > 1 else ''}")
             print(f"{'=' * 80}")
             print(result['response'])
             print(f"{'=' * 80}\n")
-            
-        except Exception as e:
-            print(f"❌ Error calling AI agents: {e}")
-            print("Falling back to summary...")
-            print_anomaly_summary(packet, second_index)
-    else:
+        
+    except Exception as e:
+        print(f"❌ Error calling AI agents: {e}")
+        print("Falling back to summary...")
         print_anomaly_summary(packet, second_index)
     
     print("=" * 80 + "\n")
@@ -131,20 +391,26 @@ async def send_buffer_to_llm(
 def print_anomaly_summary(packet: Dict, second_index: int) -> None:
     """Print summary when AI is not available"""
     print("\n[Anomaly Summary - No AI Analysis]")
+    battery = packet['battery_sensors']
+    motor = packet['motor_inverter_sensors']
+    cell_delta = battery['battery_cell_max_voltage_v'] - battery['battery_cell_min_voltage_v']
     print(f"Packet #{second_index} triggered rule violation")
-    print(f"  Battery Voltage: {packet['battery_sensors']['battery_pack_voltage_v']}V")
-    print(f"  Battery Current: {packet['battery_sensors']['battery_pack_current_a']}A")
-    print(f"  Cell Delta: {packet['battery_sensors']['battery_cell_max_voltage_v'] - packet['battery_sensors']['battery_cell_min_voltage_v']:.3f}V")
-    print(f"  Motor RPM: {packet['motor_inverter_sensors']['motor_rpm']}")
-    print(f"  Battery Temp: {packet['battery_sensors']['battery_temperature_avg_c']}°C")
-    print(f"  Inverter Temp: {packet['motor_inverter_sensors']['inverter_temperature_c']}°C")
+    print(f"  Battery Voltage: {battery['battery_pack_voltage_v']}V")
+    print(f"  Battery Current: {battery['battery_pack_current_a']}A")
+    print(f"  Cell Delta: {cell_delta:.3f}V")
+    print(f"  Motor RPM: {motor['motor_rpm']}")
+    print(f"  Battery Temp: {battery['battery_temperature_avg_c']}°C")
+    print(f"  Inverter Temp: {motor['inverter_temperature_c']}°C")
     print(f"\n💡 To enable AI analysis: Set ENABLE_AI_ANALYSIS=True and install requirements.txt")
 
 
 def load_packets(file_name: str) -> List[Dict]:
-    """Load vehicle data packets from JSON file"""
-    with open(file_name, "r", encoding="utf-8") as f:
-        data = json.load(f)
+    """
+    Load vehicle data packets from JSON file.
+    orjson yields plain floats, so file packets need no Decimal normalization.
+    """
+    with open(file_name, "rb") as f:
+        data = orjson.loads(f.read())
 
     if not isinstance(data, list):
         raise ValueError("Input JSON must be a list of packets")
@@ -152,14 +418,103 @@ def load_packets(file_name: str) -> List[Dict]:
     return data
 
 
+def iter_packets(file_name: str) -> Iterator[Dict]:
+    """
+    Yield packets from a JSON list one at a time.
+    With ijson installed the file is parsed incrementally, so memory stays flat
+    however long the log is; otherwise the whole list is loaded first.
+    """
+    if not IJSON_AVAILABLE:
+        yield from load_packets(file_name)
+        return
+
+    with open(file_name, "rb") as f:
+        yield from ijson.items(f, "item", use_float=True)
+
+
+def safe_packet_view(packet: Dict, index: int) -> Optional[PacketView]:
+    """Flatten a packet for ruleGate; None when rule fields are missing"""
+    try:
+        return packet_view(packet)
+    except (KeyError, TypeError, AttributeError) as e:
+        print(f"⚠️  Packet {index} missing rule field {e}, rules skipped for it")
+        return None
+
+
+def safe_rule_verdict(view: Optional[PacketView], MD: Dict[str, Any], index: int) -> bool:
+    """ruleGate result for one packet; errors and unusable packets count as healthy"""
+    if view is None:
+        return True
+    try:
+        return ruleGate(view, MD)
+    except Exception as e:
+        print(f"⚠️  RuleGate error at packet {index}: {e}")
+        return True
+
+
+def build_packet_views(packets: List[Dict]) -> List[Optional[PacketView]]:
+    """Flatten every packet for ruleGate; None where rule fields are missing"""
+    return [safe_packet_view(packet, i) for i, packet in enumerate(packets)]
+
+
+def precompute_rule_verdicts(views: List[Optional[PacketView]], MD: Dict[str, Any]) -> List[bool]:
+    """
+    Evaluate ruleGate for the whole packet list up front.
+    The stream replays a fixed file, so each tick only looks up its verdict.
+    """
+    return [safe_rule_verdict(view, MD, i) for i, view in enumerate(views)]
+
+
+def stream_packet_file(
+    file_name: str,
+    MD: Dict[str, Any]
+) -> Iterator[Tuple[Dict, Optional[PacketView], bool]]:
+    """
+    Replay the packet file forever as (packet, view, rule_ok), parsing and
+    checking one packet at a time. Each pass reopens the file rather than
+    caching packets, which would defeat the incremental parse.
+    """
+    while True:
+        count = 0
+        for i, packet in enumerate(iter_packets(file_name)):
+            view = safe_packet_view(packet, i)
+            yield packet, view, safe_rule_verdict(view, MD, i)
+            count += 1
+        if count == 0:
+            return
+
+
+async def iterate_inline(items: Iterable) -> AsyncIterator:
+    """Async view of an in-memory iterable; nothing here blocks"""
+    for item in items:
+        yield item
+
+
+async def iterate_in_thread(items: Iterator) -> AsyncIterator:
+    """
+    Async view of a blocking iterator. Each next() runs in a worker thread and
+    the following item is fetched while the caller handles the current one,
+    so file reads, parsing and rule checks overlap the tick sleep without
+    stalling the event loop. Only one fetch is in flight, preserving order.
+    """
+    done = object()
+    pending = asyncio.ensure_future(asyncio.to_thread(next, items, done))
+    try:
+        while True:
+            item = await pending
+            if item is done:
+                return
+            pending = asyncio.ensure_future(asyncio.to_thread(next, items, done))
+            yield item
+    finally:
+        pending.cancel()
+
+
 async def stream_and_process() -> None:
     """Main streaming loop with rule-based detection"""
     if not user:
         return
 
-    packets = load_packets(FILE_NAME)
-    total_packets = len(packets)
-    
     print(f"{'=' * 80}")
     print("🚗 VEHICLE STREAMING MONITOR - Rule-Based Detection")
     if AI_AVAILABLE:
@@ -167,71 +522,98 @@ async def stream_and_process() -> None:
     else:
         print("(AI analysis unavailable - install requirements.txt)")
     print(f"{'=' * 80}")
-    print(f"Loaded {total_packets} packets from {FILE_NAME}")
 
     MD = load_manufacturing_database()
     print("✓ Manufacturing database loaded")
+
+    if STREAM_PACKET_FILE:
+        source = iterate_in_thread(stream_packet_file(FILE_NAME, MD))
+        print(f"Streaming packets from {FILE_NAME}"
+              f"{'' if IJSON_AVAILABLE else ' (ijson not installed, loading whole file)'}")
+    else:
+        packets = load_packets(FILE_NAME)
+        views = build_packet_views(packets)
+        verdicts = precompute_rule_verdicts(views, MD)
+        source = iterate_inline(cycle(zip(packets, views, verdicts)))
+        print(f"Loaded {len(packets)} packets from {FILE_NAME}")
+        print(f"✓ Rules evaluated: {verdicts.count(False)} anomalous packets")
     
     # Initialize data manager for AI agents if available
     data_manager = None
     if AI_AVAILABLE:
         try:
-            data_manager = VehicleDataManager(db_path="dataset/newData.json")
+            data_manager = get_data_manager("dataset/newData.json")
             print("✓ AI agent system initialized")
         except:
             print("⚠️  Could not initialize AI agent system")
-    print(f"AI Analysis: {'ENABLED' if ENABLE_AI_ANALYSIS else 'DISABLED'}")
+    ai_enabled = ENABLE_AI_ANALYSIS and AI_AVAILABLE
+    print(f"AI Analysis: {'ENABLED' if ai_enabled else 'DISABLED'}")
 
     ignition_status = get_initial_ignition_status()
     print(f"✓ Initial ignition status: {ignition_status}")
     print(f"{'=' * 80}\n")
 
+    # Rolling window of flattened PacketView records rather than nested packet
+    # dicts, so streamed packets are freed as soon as their tick is done
     buffer = deque(maxlen=BUFFER_SIZE_SECONDS)
+    # In-flight anomaly analyses; they run alongside the packet loop
+    pending: Set[asyncio.Task] = set()
 
-    idx = 0
     second_counter = 0
 
     try:
-        while user:
-            packet = normalize_packet(packets[idx])
-            idx = (idx + 1) % total_packets
+        async for packet, view, rule_ok in source:
+            if not user:
+                break
             second_counter += 1
 
-            ignition_status = packet.get(
-                "operational_context", {}
-            ).get("ignition_status", ignition_status)
+            if view is not None:
+                if view.ignition is not None:
+                    ignition_status = view.ignition
+            else:
+                # The view builder rejected this packet; ignition may still be readable from it
+                context = packet.get("operational_context") if isinstance(packet, dict) else None
+                if isinstance(context, dict):
+                    ignition_status = context.get("ignition_status", ignition_status)
 
-            buffer.append(packet)
+            buffer.append(view)
 
-            try:
-                rule_ok = ruleGate(packet, MD)
-            except Exception as e:
-                print(f"⚠️  RuleGate error: {e}")
-                rule_ok = True
-
-            status = "✓" if rule_ok else "⚠️ "
-            print(
-                f"[T+{second_counter}s] {status} "
-                f"Ignition={ignition_status} | "
-                f"RuleOK={rule_ok} | "
-                f"BufferSize={len(buffer)}"
-            )
+            if tick_logger.isEnabledFor(logging.INFO):
+                tick_logger.info(
+                    "[T+%ds] %s Ignition=%s | RuleOK=%s | BufferSize=%d",
+                    second_counter, "✓" if rule_ok else "⚠️ ",
+                    ignition_status, rule_ok, len(buffer)
+                )
 
             if not rule_ok:
-                await send_buffer_to_llm(buffer, second_counter, packet, data_manager)
-
-            time.sleep(
+                fired = rules_fired(ruleMask(view, MD))
+                if ai_enabled:
+                    task = asyncio.create_task(
+                        send_buffer_to_llm(buffer, second_counter, packet, data_manager, fired)
+                    )
+                    pending.add(task)
+                    task.add_done_callback(pending.discard)
+                else:
+                    report_anomaly(buffer, second_counter, packet, fired)
+
+            await asyncio.sleep(
                 HIGH_IGNITION_SLEEP_SEC
                 if ignition_status == 1
                 else LOW_IGNITION_SLEEP_SEC
             )
-    except KeyboardInterrupt:
+    except (KeyboardInterrupt, asyncio.CancelledError):
         print("\n\nMonitoring stopped by user (Ctrl+C)")
         print(f"Total packets processed: {second_counter}")
         print(f"{'=' * 80}")
+    finally:
+        for task in pending:
+            task.cancel()
+        await asyncio.gather(*pending, return_exceptions=True)
+        await anomaly_batcher.aclose()
 
 
 if __name__ == "__main__":
+    logging.basicConfig(level=TICK_LOG_LEVEL, format="%(message)s", stream=sys.stdout)
     print("Starting Vehicle Streaming Monitor...")
     print("Press Ctrl+C to stop\n")
     asyncio.run(stream_and_process())
@@ -16,9 +16,12 @@ Returns:
     True  = Vehicle healthy, continue monitoring
     False = Anomaly detected, trigger AI analysis
 """
-import json
+import functools
 import os
-from typing import Dict, Any
+from collections import namedtuple
+from typing import Dict, Any, List
+
+import orjson
 
 # ---------------------------------------------------------------------
 # Manufacturing Database Loader
@@ -28,72 +31,140 @@ BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 DB_PATH = os.path.join(BASE_DIR, "Manufacturing_Database.json")
 
 
+@functools.lru_cache(maxsize=1)
+def _load_mdb(path: str, mtime_ns: int) -> Dict[str, Any]:
+    """Parse the database file; cached per (path, mtime)"""
+    with open(path, "rb") as f:
+        return orjson.loads(f.read())
+
+
 def load_manufacturing_database() -> Dict[str, Any]:
     """
     Load manufacturing database from JSON.
-    Loaded once and injected into ruleGate.
+    Loaded once and injected into ruleGate; later calls return the cached dict
+    until the file's mtime changes.
     """
-    with open(DB_PATH, "r", encoding="utf-8") as f:
-        return json.load(f)
+    return _load_mdb(DB_PATH, os.stat(DB_PATH).st_mtime_ns)
+
+
+# ---------------------------------------------------------------------
+# Packet View
+# ---------------------------------------------------------------------
+
+PacketView = namedtuple(
+    "PacketView",
+    "cell_max cell_min pack_current pack_voltage motor_rpm inv_temp temp_rise "
+    "batt_temp_avg gps_wheel_delta wheel_var thermal_cycles ambient_temp load_kg ignition",
+)
+
+
+def packet_view(packet: Dict[str, Any]) -> PacketView:
+    """
+    Flatten the sensor fields used by ruleGate out of a nested packet.
+    Built once per packet at load time so rule checks are plain attribute reads.
+
+    Raises:
+        KeyError if a sensor group or field the rules need is missing
+    """
+    battery = packet["battery_sensors"]
+    motor = packet["motor_inverter_sensors"]
+    signal = packet["signal_consistency"]
+    return PacketView(
+        cell_max=battery["battery_cell_max_voltage_v"],
+        cell_min=battery["battery_cell_min_voltage_v"],
+        pack_current=battery["battery_pack_current_a"],
+        pack_voltage=battery["battery_pack_voltage_v"],
+        motor_rpm=motor["motor_rpm"],
+        inv_temp=motor["inverter_temperature_c"],
+        temp_rise=packet["rate_of_change"]["battery_temp_rise_rate_c_per_min"],
+        batt_temp_avg=battery["battery_temperature_avg_c"],
+        gps_wheel_delta=signal["gps_vs_wheel_speed_delta"],
+        wheel_var=signal["wheel_speed_variance_ratio"],
+        thermal_cycles=packet["component_aging"]["thermal_cycle_count"],
+        ambient_temp=packet["environmental_sensors"]["ambient_air_temperature_c"],
+        load_kg=packet["operational_context"]["vehicle_load_estimated_kg"],
+        ignition=packet["operational_context"].get("ignition_status"),
+    )
 
 
 # ---------------------------------------------------------------------
 # Rule Gate
 # ---------------------------------------------------------------------
 
-def ruleGate(packet: Dict[str, Any], MD: Dict[str, Any]) -> bool:
+def ruleGate(view: PacketView, MD: Dict[str, Any]) -> bool:
     """
-    Runtime-safe rule gate.
+    Runtime-safe rule gate over a flattened packet (see packet_view).
 
     Returns:
         True  -> packet is healthy
         False -> anomaly detected
     """
 
-    # ---------------- Battery imbalance under load ----------------
-    cell_delta = (
-        packet["battery_sensors"]["battery_cell_max_voltage_v"]
-        - packet["battery_sensors"]["battery_cell_min_voltage_v"]
-    )
+    pack_current = view.pack_current
+
+    # Rules run most-firing first on the sample data, and inside each rule the
+    # rarest condition comes first so healthy packets fail the check early.
 
-    if cell_delta > 0.08 and packet["battery_sensors"]["battery_pack_current_a"] > 120:
+    # ---------------- Sustained electrical stress ----------------
+    if pack_current > 125 and view.pack_voltage < 370:
         return False
 
     # ---------------- Thermal stress coupling ----------------
-    if (
-        packet["motor_inverter_sensors"]["motor_rpm"] > 7600
-        and packet["motor_inverter_sensors"]["inverter_temperature_c"] > 56
-        and packet["rate_of_change"]["battery_temp_rise_rate_c_per_min"] > 0.48
-    ):
+    if view.motor_rpm > 7600 and view.inv_temp > 56 and view.temp_rise > 0.48:
         return False
 
-    # ---------------- Sustained electrical stress ----------------
-    if (
-        packet["battery_sensors"]["battery_pack_voltage_v"] < 370
-        and packet["battery_sensors"]["battery_pack_current_a"] > 125
-    ):
+    # ---------------- Battery imbalance under load ----------------
+    if view.cell_max - view.cell_min > 0.08 and pack_current > 120:
         return False
 
     # ---------------- Signal consistency degradation ----------------
-    if (
-        packet["signal_consistency"]["gps_vs_wheel_speed_delta"] > 2.2
-        and packet["signal_consistency"]["wheel_speed_variance_ratio"] > 1.06
-    ):
+    if view.gps_wheel_delta > 2.2 and view.wheel_var > 1.06:
         return False
 
-    # ---------------- Thermal aging awareness ----------------
-    if (
-        packet["component_aging"]["thermal_cycle_count"] > 950
-        and packet["battery_sensors"]["battery_temperature_avg_c"] > 33.5
-    ):
+    # ---------------- Environmental + load interaction ----------------
+    if view.load_kg > 220 and view.ambient_temp > 30 and pack_current > 122:
         return False
 
-    # ---------------- Environmental + load interaction ----------------
-    if (
-        packet["environmental_sensors"]["ambient_air_temperature_c"] > 30
-        and packet["operational_context"]["vehicle_load_estimated_kg"] > 220
-        and packet["battery_sensors"]["battery_pack_current_a"] > 122
-    ):
+    # ---------------- Thermal aging awareness ----------------
+    if view.thermal_cycles > 950 and view.batt_temp_avg > 33.5:
         return False
 
-    return True
\ No newline at end of file
+    return True
+
+
+# ---------------------------------------------------------------------
+# Rule Mask
+# ---------------------------------------------------------------------
+
+RULE_NAMES = (
+    "Battery cell imbalance",
+    "Thermal stress",
+    "Electrical stress",
+    "Signal inconsistency",
+    "Thermal aging",
+    "Environmental load",
+)
+
+
+def ruleMask(view: PacketView, MD: Dict[str, Any]) -> int:
+    """
+    Evaluate all six rules as one fused expression, without early exit.
+
+    Returns:
+        Bitmask with bit i set when rule i+1 (module docstring numbering)
+        fired; 0 exactly when ruleGate returns True
+    """
+    pack_current = view.pack_current
+    return (
+        ((view.cell_max - view.cell_min > 0.08) & (pack_current > 120))
+        | (((view.motor_rpm > 7600) & (view.inv_temp > 56) & (view.temp_rise > 0.48)) << 1)
+        | (((pack_current > 125) & (view.pack_voltage < 370)) << 2)
+        | (((view.gps_wheel_delta > 2.2) & (view.wheel_var > 1.06)) << 3)
+        | (((view.thermal_cycles > 950) & (view.batt_temp_avg > 33.5)) << 4)
+        | (((view.load_kg > 220) & (view.ambient_temp > 30) & (pack_current > 122)) << 5)
+    )
+
+
+def rules_fired(mask: int) -> List[str]:
+    """Names of the rules set in a ruleMask result"""
+    return [name for i, name in enumerate(RULE_NAMES) if mask >> i & 1]
@@ -75,6 +75,16 @@ print("});")
 print("```")
 print("-" * 80 + "\n")
 
+# Metric names/values that the Key Values splitter must keep intact
+from response_parser import extract_metrics
+battery_metrics = result['categories'][0]['metrics']
+assert battery_metrics['Pack Curr'] == '114 A', battery_metrics
+assert extract_metrics('Roll 0.32°, Suspension travel 18–19 mm, Stress 0.38')['Suspension travel'] == '18–19 mm'
+assert extract_metrics('12V battery 12.4 V, SOC 50 %') == {'12V battery': '12.4 V', 'SOC': '50 %'}
+assert extract_metrics('Voltage: 12.4V') == {'Voltage': '12.4V'}
+assert extract_metrics('RPM 7 420; Inverter 54.2 °C') == {'RPM': '7 420', 'Inverter': '54.2 °C'}
+assert extract_metrics('12.4 V, Nominal') == {}
+
 print("✅ Parser working correctly!")
 print(f"   - Extracted vehicle ID: {result['vehicle_id']}")
 print(f"   - Found {len(result['categories'])} categories")
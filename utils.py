@@ -1,7 +1,9 @@
 """
 Utility functions for vehicle data management
 """
+import functools
 import json
+import os
 from typing import Dict, List, Optional, Any
 from pathlib import Path
 
@@ -135,6 +137,27 @@ class VehicleDataManager:
         return 0
 
 
+@functools.lru_cache(maxsize=4)
+def _shared_data_manager(resolved_path: str, mtime_ns: int) -> VehicleDataManager:
+    return VehicleDataManager(db_path=resolved_path)
+
+
+def get_data_manager(db_path: str = "dataset/newData.json") -> VehicleDataManager:
+    """
+    Shared, read-only VehicleDataManager for a database file.
+    Every caller naming the same file gets one instance, so concurrent agent
+    contexts don't each re-read and re-parse the JSON; a new instance is built
+    once the file's mtime changes. Don't patch or mutate it; build a
+    VehicleDataManager directly for that.
+    """
+    resolved_path = str(Path(db_path).resolve())
+    try:
+        mtime_ns = os.stat(resolved_path).st_mtime_ns
+    except FileNotFoundError:
+        mtime_ns = 0  # VehicleDataManager serves an empty dataset
+    return _shared_data_manager(resolved_path, mtime_ns)
+
+
 class AnalysisLogger:
     def __init__(self):
         self.logs = []